@@ -2,21 +2,35 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, PhotoImage
 import pandas as pd
 import httpx
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
 import numpy as np
-from concurrent.futures import ThreadPoolExecutor
-from threading import Thread
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from threading import Thread, Lock, Condition, local, current_thread, main_thread, enumerate as threading_enumerate
+from itertools import count
 import os
-from datetime import datetime
-import matplotlib
+from datetime import datetime, timezone
 import webbrowser
-matplotlib.use("TkAgg")
-
-# Set modern font and style for plots
-plt.rcParams['font.family'] = 'Arial'
-plt.style.use('ggplot')
+import json
+import sys
+import gc
+import sqlite3
+import time
+import uuid
+import functools
+import multiprocessing
+from types import FunctionType
+import atexit
+import platform
+import re
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, deque
+from operator import attrgetter
+import hashlib
+import hmac
+import secrets
+import struct
+import zlib
+import mmap
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 LEETCODE_API_URL = "https://leetcode.com/graphql"
 USER_PROFILE_QUERY = """
@@ -33,12 +47,2565 @@ query getUserProfile($username: String!) {
 }
 """
 
+# Extended query - pulls contest, calendar, recent AC and language stats
+# in the same round trip as the basic solved counts
+EXTENDED_PROFILE_QUERY = """
+query getUserProfileExtended($username: String!) {
+  matchedUser(username: $username) {
+    username
+    submitStats: submitStatsGlobal {
+      acSubmissionNum {
+        difficulty
+        count
+        submissions
+      }
+      totalSubmissionNum {
+        difficulty
+        count
+        submissions
+      }
+    }
+    submissionCalendar
+    languageProblemCount {
+      languageName
+      problemsSolved
+    }
+  }
+  userContestRanking(username: $username) {
+    rating
+    globalRanking
+    attendedContestsCount
+  }
+  recentAcSubmissionList(username: $username, limit: 20) {
+    title
+    timestamp
+    lang
+  }
+}
+"""
+
+# Keys filled in by an extended fetch, with their "no data" values
+EXTENDED_DEFAULTS = {
+    "contest_rating": 0,
+    "contest_ranking": 0,
+    "contests_attended": 0,
+    "current_streak": 0,
+    "max_streak": 0,
+    "active_days_7": 0,
+    "active_days_30": 0,
+    "submissions_7": 0,
+    "submissions_30": 0,
+    "acceptance_rate": 0.0,
+    "top_language": "",
+    "languages": "",
+    "recent_accepted": 0,
+    "last_accepted": "",
+}
+
+
+def compute_derived_metrics(calendar, ac_stats, total_stats, languages, recent_ac, now=None):
+    """Compute streaks, recent activity and acceptance rate from raw profile data"""
+    # LeetCode's calendar buckets days in UTC, so "today" must be the UTC date too
+    now = now or datetime.now(timezone.utc)
+    metrics = dict(EXTENDED_DEFAULTS)
+
+    # submissionCalendar comes back as a JSON string of {unix_ts: count}
+    if isinstance(calendar, str):
+        try:
+            calendar = json.loads(calendar)
+        except ValueError:
+            calendar = {}
+    calendar = calendar or {}
+
+    day_counts = {}
+    for ts, count in calendar.items():
+        day = datetime.fromtimestamp(int(ts), timezone.utc).date()
+        day_counts[day] = day_counts.get(day, 0) + int(count)
+    active_days = sorted(day for day, count in day_counts.items() if count > 0)
+
+    today = now.date()
+    for day in active_days:
+        age = (today - day).days
+        if 0 <= age < 7:
+            metrics["active_days_7"] += 1
+            metrics["submissions_7"] += day_counts[day]
+        if 0 <= age < 30:
+            metrics["active_days_30"] += 1
+            metrics["submissions_30"] += day_counts[day]
+
+    # Longest run of consecutive active days
+    run = 0
+    previous = None
+    for day in active_days:
+        run = run + 1 if previous is not None and (day - previous).days == 1 else 1
+        metrics["max_streak"] = max(metrics["max_streak"], run)
+        previous = day
+
+    # Current streak counts back from today (or yesterday, if today is still empty)
+    if active_days and (today - active_days[-1]).days <= 1:
+        streak = 1
+        for earlier, later in zip(reversed(active_days[:-1]), reversed(active_days)):
+            if (later - earlier).days != 1:
+                break
+            streak += 1
+        metrics["current_streak"] = streak
+
+    # Acceptance rate over all difficulties (accepted submissions / all submissions)
+    accepted = next((i.get("submissions", 0) for i in ac_stats or [] if i["difficulty"] == "All"), 0)
+    attempted = next((i.get("submissions", 0) for i in total_stats or [] if i["difficulty"] == "All"), 0)
+    if attempted:
+        metrics["acceptance_rate"] = round(100.0 * accepted / attempted, 1)
+
+    # Language breakdown, most used first
+    languages = sorted(languages or [], key=lambda x: x.get("problemsSolved", 0), reverse=True)
+    if languages:
+        metrics["top_language"] = languages[0]["languageName"]
+        metrics["languages"] = ", ".join(
+            f"{lang['languageName']} ({lang['problemsSolved']})" for lang in languages[:5]
+        )
+
+    recent_ac = recent_ac or []
+    metrics["recent_accepted"] = len(recent_ac)
+    if recent_ac:
+        metrics["last_accepted"] = recent_ac[0].get("title", "")
+
+    return metrics
+
+
+class ExtendedStats:
+    """Extended-fetch metrics, attached to a StudentRecord only once fetched"""
+    __slots__ = tuple(EXTENDED_DEFAULTS)
+
+
+class StudentRecord:
+    """Compact student row - fixed __slots__ instead of a per-student dict"""
+
+    ROSTER_FIELDS = ("name", "leetcode_username", "roll_number", "email", "phone")
+    COUNT_FIELDS = ("problems_solved", "easy_count", "medium_count", "hard_count")
+    __slots__ = ROSTER_FIELDS + ("section", "student_id") + COUNT_FIELDS + ("profile_found", "extended")
+
+    def __init__(self, **fields):
+        for field in self.COUNT_FIELDS:
+            setattr(self, field, 0)
+        self.profile_found = False
+        self.extended = None
+        self.update(fields)
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a record from a pandas row dict, turning blank (NaN) cells into ''"""
+        record = cls()
+        for field in cls.ROSTER_FIELDS:
+            record[field] = clean_cell(row.get(field, ""))
+        return record
+
+    # Dict-style access so records drop in wherever student dicts were used
+    def get(self, key, default=None):
+        if key in EXTENDED_DEFAULTS:
+            return getattr(self.extended, key, default)
+        return getattr(self, key, default)
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if isinstance(value, str):
+            value = sys.intern(value)
+        elif isinstance(value, (np.integer, np.bool_)):
+            value = value.item()
+        if key in EXTENDED_DEFAULTS:
+            if self.extended is None:
+                self.extended = ExtendedStats()
+            setattr(self.extended, key, value)
+        else:
+            setattr(self, key, value)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def update(self, fields):
+        for key, value in fields.items():
+            self[key] = value
+
+    def to_dict(self):
+        fields = {field: getattr(self, field) for field in self.__slots__[:-1] if hasattr(self, field)}
+        if self.extended is not None:
+            fields.update({field: getattr(self.extended, field)
+                           for field in ExtendedStats.__slots__ if hasattr(self.extended, field)})
+        return fields
+
+    def __repr__(self):
+        return f"StudentRecord({self.to_dict()!r})"
+
+
+_MISSING = object()
+
+
+def clean_cell(value):
+    """Roster cell as an interned string; NaN -> '', 12345.0 -> '12345'"""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if np.isnan(value):
+            return ""
+        if value.is_integer():
+            value = int(value)
+    return sys.intern(str(value).strip())
+
+
+def benchmark_record_memory(rows=100_000):
+    """Compare per-row memory of pandas-style dicts vs StudentRecord"""
+    import tracemalloc
+
+    def make_row(i):
+        return {
+            "name": f"Student {i}", "leetcode_username": f"user_{i}",
+            "roll_number": f"727622BAM{i:05d}", "email": float("nan"), "phone": float("nan")
+        }
+
+    def measure(build):
+        tracemalloc.start()
+        data = build()
+        view = data.copy()  # displayed_data holds references, as in the app
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del data, view
+        return size
+
+    def build_dicts():
+        data = [make_row(i) for i in range(rows)]
+        for i, student in enumerate(data):
+            student.update({"section": "A", "student_id": f"s{i}", "problems_solved": i % 500,
+                            "easy_count": i % 200, "medium_count": i % 250, "hard_count": i % 50,
+                            "profile_found": True})
+        return data
+
+    def build_records():
+        data = [StudentRecord.from_row(make_row(i)) for i in range(rows)]
+        for i, student in enumerate(data):
+            student.update({"section": "A", "student_id": f"s{i}", "problems_solved": i % 500,
+                            "easy_count": i % 200, "medium_count": i % 250, "hard_count": i % 50,
+                            "profile_found": True})
+        return data
+
+    dict_bytes = measure(build_dicts)
+    record_bytes = measure(build_records)
+    print(f"Student record memory ({rows} rows)")
+    print(f"  dict rows:          {dict_bytes / 2**20:8.1f} MiB ({dict_bytes / rows:6.0f} B/row)")
+    print(f"  StudentRecord rows: {record_bytes / 2**20:8.1f} MiB ({record_bytes / rows:6.0f} B/row)")
+    print(f"  reduction:          {100 * (1 - record_bytes / dict_bytes):8.1f}%")
+
+
+def file_digest(path):
+    """SHA-1 of a file's contents, read in 1 MiB blocks"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def excel_engine(file_path, calamine=True):
+    """Fastest installed engine for a workbook: calamine (Rust, reads xls and xlsx), else openpyxl/xlrd"""
+    if calamine:
+        try:
+            import python_calamine  # noqa: F401 - pandas loads it by engine name
+            return "calamine"
+        except ImportError:
+            pass
+    return "xlrd" if file_path.endswith(".xls") else "openpyxl"
+
+
+# Parsed workbooks, keyed by content hash, as uncompressed .npz column arrays in a
+# per-user directory (see default_roster_cache_dir) - they hold names, emails and phones
+def load_cached_roster(cache_dir, digest):
+    try:
+        with np.load(os.path.join(cache_dir, digest + ".npz"), allow_pickle=False) as data:
+            return {field: data[field] for field in StudentRecord.ROSTER_FIELDS}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def save_cached_roster(cache_dir, digest, columns):
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        # Write then rename, so a parallel parse never sees half a file
+        tmp_path = os.path.join(cache_dir, f"{digest}.{os.getpid()}.tmp.npz")
+        np.savez(tmp_path, **columns)
+        os.replace(tmp_path, os.path.join(cache_dir, digest + ".npz"))
+    except OSError:
+        pass  # caching is best-effort
+
+
+def parse_roster_file(file_path, cache_dir=None):
+    """Read one roster file into compact columnar arrays.
+
+    Runs in a worker process: the returned chunk holds fixed-width numpy
+    string arrays, which pickle as flat buffers and are cheap to ship back.
+    Only the roster columns are read; workbooks go through the fastest
+    installed engine and, given a cache_dir, are cached by content hash.
+    The chunk records the engine used and the parse time.
+    """
+    start = time.perf_counter()
+    chunk = {"path": file_path, "section": os.path.splitext(os.path.basename(file_path))[0]}
+    wanted = lambda column: column in StudentRecord.ROSTER_FIELDS
+    digest = None
+    if file_path.endswith('.csv'):
+        chunk["engine"] = "csv"
+        df = pd.read_csv(file_path, dtype=str, usecols=wanted)
+    else:
+        digest = file_digest(file_path) if cache_dir else None
+        columns = load_cached_roster(cache_dir, digest) if digest else None
+        if columns is not None:
+            chunk.update(columns=columns, rows=len(columns["name"]), engine="cache",
+                         parse_seconds=time.perf_counter() - start)
+            return chunk
+        chunk["engine"] = excel_engine(file_path)
+        try:
+            df = pd.read_excel(file_path, dtype=str, usecols=wanted, engine=chunk["engine"])
+        except Exception:
+            if chunk["engine"] != "calamine":
+                raise
+            # pandas < 2.2 has no calamine engine (and calamine may reject an odd workbook)
+            chunk["engine"] = excel_engine(file_path, calamine=False)
+            df = pd.read_excel(file_path, dtype=str, usecols=wanted, engine=chunk["engine"])
+
+    if not all(col in df.columns for col in ("name", "leetcode_username")):
+        chunk["error"] = "Missing required columns: name or leetcode_username"
+        return chunk
+
+    # Normalize every roster column at once (blank cells -> "")
+    columns = {}
+    for field in StudentRecord.ROSTER_FIELDS:
+        if field in df.columns:
+            values = df[field].fillna("").astype(str).str.strip()
+        else:
+            values = pd.Series("", index=df.index)
+        columns[field] = np.array(values.tolist(), dtype=str)
+    chunk["columns"] = columns
+    chunk["rows"] = len(df)
+    if digest is not None:
+        save_cached_roster(cache_dir, digest, columns)
+    chunk["parse_seconds"] = time.perf_counter() - start
+    return chunk
+
+
+def records_from_chunk(chunk):
+    """Turn a columnar roster chunk into StudentRecords"""
+    columns = [chunk["columns"][field].tolist() for field in StudentRecord.ROSTER_FIELDS]
+    records = []
+    for values in zip(*columns):
+        record = StudentRecord()
+        record.update(dict(zip(StudentRecord.ROSTER_FIELDS, values)))
+        records.append(record)
+    return records
+
+
+def roster_key(roll_number, username):
+    """Identity of a roster row across edits: roll number, else username"""
+    if roll_number:
+        return ("roll", roll_number)
+    username = normalize_username(username)
+    return ("user", username) if username else None
+
+
+def diff_roster(students, chunk):
+    """Match an edited roster chunk against the loaded records of its section.
+
+    Returns (roster, added, removed, renamed, updates): the new roster in file
+    order reusing loaded records, new records, dropped records, (record, old
+    username key) pairs whose username changed, and (record, fields) edits
+    for Workspace.patch_roster to apply. Loaded records are not modified, so
+    this can run off the main thread.
+    """
+    # One tuple per row - the cyclic GC would otherwise rescan the heap repeatedly
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _diff_roster(students, chunk)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _diff_roster(students, chunk):
+    # Identical rows match on the whole tuple; only the rest need key matching
+    fields = StudentRecord.ROSTER_FIELDS
+    unchanged = {}
+    for values, student in zip(map(attrgetter(*fields), students), students):
+        unchanged.setdefault(values, []).append(student)
+    rows = list(zip(*[chunk["columns"][field].tolist() for field in fields]))
+    roster = [None] * len(rows)
+    edited = []
+    for i, values in enumerate(rows):
+        matches = unchanged.get(values)
+        if matches:
+            roster[i] = matches.pop()
+        else:
+            edited.append(i)
+
+    leftover = {}
+    for matches in unchanged.values():
+        for student in matches:
+            leftover.setdefault(roster_key(student.roll_number, student.leetcode_username), []).append(student)
+
+    added, renamed, updates = [], [], []
+    for i in edited:
+        values = rows[i]
+        matches = leftover.get(roster_key(values[2], values[1]))
+        if matches:
+            record = matches.pop(0)
+            old_key = normalize_username(record.leetcode_username)
+            updates.append((record, dict(zip(fields, values))))
+            if normalize_username(values[1]) != old_key:
+                renamed.append((record, old_key))
+        else:
+            record = StudentRecord()
+            record.update(dict(zip(fields, values)))
+            added.append(record)
+        roster[i] = record
+
+    removed = [student for matches in leftover.values() for student in matches]
+    return roster, added, removed, renamed, updates
+
+
+def process_pool(max_workers):
+    """Process pool safe to start from worker threads: spawned children inherit no held locks"""
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def parse_roster_files(file_paths, cache_dir=None):
+    """Parse roster files, fanning out across a process pool when there are several"""
+    if len(file_paths) == 1:
+        return [parse_roster_file(file_paths[0], cache_dir)]
+    workers = min(len(file_paths), os.cpu_count() or 1)
+    with process_pool(workers) as pool:
+        return list(pool.map(functools.partial(parse_roster_file, cache_dir=cache_dir), file_paths))
+
+
+# Class distribution buckets shared by the progress chart and section aggregates
+PROGRESS_RANGES = [(0, 0), (1, 25), (26, 50), (51, 100), (101, 200), (201, 300), (301, float('inf'))]
+PROGRESS_LABELS = ['0', '1-25', '26-50', '51-100', '101-200', '201-300', '301+']
+PROGRESS_BIN_EDGES = [-0.5, 0.5, 25.5, 50.5, 100.5, 200.5, 300.5, float('inf')]
+
+
+def normalize_username(username):
+    """Canonical form of a LeetCode username ('' for blank/NaN cells)"""
+    if username is None or (isinstance(username, float) and np.isnan(username)):
+        return ""
+    return str(username).strip().lower()
+
+
+# How long a "profile does not exist" answer is reused, in every cache layer.
+# Students who fix a typo are picked up by "Re-validate Invalid" straight away.
+NEGATIVE_TTL = 6 * 3600
+
+
+class FetchStore:
+    """Thread-safe fetch results keyed by normalized username, shared by all rosters.
+
+    Not-found results are a negative cache: they are reused for negative_ttl
+    seconds and indexed so invalid profiles can be listed without a scan.
+    Transient errors are kept (so the row shows something) but indexed
+    separately and always refetched.
+    """
+
+    def __init__(self, negative_ttl=NEGATIVE_TTL):
+        self._results = {}
+        self._invalid = set()  # keys of profiles LeetCode says do not exist
+        self._errors = {}  # key -> error message of the last failed fetch
+        self.negative_ttl = negative_ttl
+        self._lock = Lock()
+
+    def _index(self, key, result):
+        if isinstance(result, StudentRecord):
+            found, error = result.profile_found, None
+        else:
+            found, error = result["found"], result.get("error")
+        self._invalid.discard(key)
+        self._errors.pop(key, None)
+        if error:
+            self._errors[key] = error
+        elif not found:
+            self._invalid.add(key)
+
+    def get(self, username, extended=False):
+        """Return the cached result, or None if missing (or lacking extended stats)"""
+        with self._lock:
+            entry = self._results.get(normalize_username(username))
+        if entry is None:
+            return None
+        result = entry[1]
+        if isinstance(result, StudentRecord):
+            # Seeded from a snapshot - rebuild the result lazily
+            result = result_from_record(result)
+        if extended and result["found"] and "extended" not in result:
+            return None
+        return result
+
+    def fetched_at(self, username):
+        with self._lock:
+            entry = self._results.get(normalize_username(username))
+        return entry[0] if entry else None
+
+    def needs_fetch(self, username, extended=False):
+        """True when there is no usable result: missing, failed, or an expired negative entry"""
+        key = normalize_username(username)
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None or key in self._errors:
+                return True
+            if key in self._invalid:
+                return (datetime.now() - entry[0]).total_seconds() >= self.negative_ttl
+        return self.get(key, extended) is None
+
+    def put(self, username, result, fetched_at=None):
+        key = normalize_username(username)
+        with self._lock:
+            self._results[key] = (fetched_at or datetime.now(), result)
+            self._index(key, result)
+
+    def seed(self, entries):
+        """Bulk-load {username: (fetched_at, result or StudentRecord)} entries"""
+        with self._lock:
+            self._results.update(entries)
+            for key, (_, result) in entries.items():
+                self._index(key, result)
+
+    def invalid_usernames(self):
+        """Normalized usernames whose last fetch said the profile does not exist"""
+        with self._lock:
+            return list(self._invalid)
+
+    def error_usernames(self):
+        with self._lock:
+            return list(self._errors)
+
+    def forget_found(self):
+        """Drop every result except fresh not-found entries, so the next fetch refreshes stats"""
+        with self._lock:
+            self._results = {key: entry for key, entry in self._results.items() if key in self._invalid}
+            self._errors.clear()
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._invalid.clear()
+            self._errors.clear()
+
+    def __len__(self):
+        return len(self._results)
+
+
+class SharedFetchCache:
+    """Fetch cache shared by the dashboard processes that open the same file (SQLite, WAL mode).
+
+    Only one process fetches a given username at a time: the first to insert
+    an in-flight lease fetches, the others wait for its result to land.
+    Every process that can write the file is trusted to store real results,
+    so it lives in a per-user directory by default (see default_cache_path).
+    """
+
+    def __init__(self, path, ttl=600, lease=30, negative_ttl=NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl  # same as FetchStore: a not-found answer rarely changes
+        self.lease = lease
+        self.owner = uuid.uuid4().hex
+        self._local = local()
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS results ("
+                       "username TEXT PRIMARY KEY, extended INTEGER, fetched_at REAL, result TEXT)")
+            db.execute("CREATE TABLE IF NOT EXISTS inflight ("
+                       "username TEXT PRIMARY KEY, owner TEXT, expires REAL)")
+
+    def _connect(self):
+        # sqlite3 connections are per thread
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10.0)
+            db.execute("PRAGMA busy_timeout=10000")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def lookup(self, username, extended=False, max_age=None):
+        """Fresh cached result for username, or None; max_age tightens the TTL (e.g. for refreshes)"""
+        now = time.time()
+        ttl, negative_ttl = self.ttl, self.negative_ttl
+        if max_age is not None:
+            ttl, negative_ttl = min(ttl, max_age), min(negative_ttl, max_age)
+        row = self._connect().execute(
+            "SELECT result, fetched_at FROM results WHERE username=? AND fetched_at>=? AND extended>=?",
+            (username, now - max(ttl, negative_ttl), int(extended))
+        ).fetchone()
+        if row is None:
+            return None
+        result = json.loads(row[0])
+        if row[1] < now - (ttl if result["found"] else negative_ttl):
+            return None
+        return result
+
+    def store(self, username, extended, result):
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                       (username, int(extended), time.time(), json.dumps(result)))
+
+    def _acquire(self, username):
+        now = time.time()
+        with self._connect() as db:
+            db.execute("DELETE FROM inflight WHERE username=? AND expires<?", (username, now))
+            cursor = db.execute("INSERT OR IGNORE INTO inflight VALUES (?, ?, ?)",
+                                (username, self.owner, now + self.lease))
+            return cursor.rowcount == 1
+
+    def _release(self, username):
+        with self._connect() as db:
+            db.execute("DELETE FROM inflight WHERE username=? AND owner=?", (username, self.owner))
+
+    def fetch(self, username, extended, fetch, max_age=None):
+        """Return a cached result, or call fetch() - at most one process per username"""
+        key = normalize_username(username)
+        try:
+            while True:
+                result = self.lookup(key, extended, max_age)
+                if result is not None:
+                    return result
+                if self._acquire(key):
+                    # The previous holder may have stored its result just before releasing
+                    result = self.lookup(key, extended, max_age)
+                    if result is not None:
+                        self._release(key)
+                        return result
+                    break
+                # Someone else is fetching this username; its lease bounds the wait
+                time.sleep(0.2)
+        except sqlite3.Error:
+            return fetch()  # cache unavailable (locked, read-only) - fetch directly
+
+        try:
+            result = fetch()
+            # Transient failures are not shared - another process may do better
+            if not result.get("error"):
+                self.store(key, extended, result)
+            return result
+        except sqlite3.Error:
+            return result
+        finally:
+            try:
+                self._release(key)
+            except sqlite3.Error:
+                pass
+
+
+def user_cache_dir():
+    """Per-user cache directory (never the world-writable temp dir)"""
+    base = (os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+            or os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "leetcode_dashboard")
+
+
+def default_cache_path():
+    return os.path.join(user_cache_dir(), "fetch_cache.sqlite")
+
+
+def default_roster_cache_dir():
+    return os.path.join(user_cache_dir(), "rosters")
+
+
+def open_shared_cache(path):
+    """Open the shared cache, or return None (per-process fetching) if it is unusable"""
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), mode=0o700, exist_ok=True)
+        return SharedFetchCache(path)
+    except (OSError, sqlite3.Error):
+        return None
+
+
+# Recording file: a sequence of [20-byte request digest][u16 status][u32 length][zlib body]
+# records. The digest -> offset index is rebuilt on open by hopping over headers.
+RECORD_HEADER = struct.Struct("<20sHI")
+
+
+def request_digest(request):
+    """Stable key for a GraphQL request: method, URL and the JSON body with sorted keys"""
+    body = request.content
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True).encode("utf-8")
+    except ValueError:
+        pass
+    return hashlib.sha1(request.method.encode() + b" " + str(request.url).encode() + b"\n" + body).digest()
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """Passes requests through to the network and appends each request/response pair to a file"""
+
+    def __init__(self, path, transport=None):
+        self.path = path
+        self.transport = transport or httpx.HTTPTransport()
+        self._lock = Lock()
+
+    def handle_request(self, request):
+        response = self.transport.handle_request(request)
+        body = response.read()
+        response.close()
+        with self._lock, open(self.path, "ab") as f:
+            compressed = zlib.compress(body)
+            f.write(RECORD_HEADER.pack(request_digest(request), response.status_code, len(compressed)))
+            f.write(compressed)
+        # body is already decoded - drop headers describing the wire encoding
+        headers = [(k, v) for k, v in response.headers.items()
+                   if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+        return httpx.Response(response.status_code, headers=headers, content=body)
+
+    def close(self):
+        self.transport.close()
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """Serves recorded responses without touching the network.
+
+    latency adds a fixed delay (seconds) per request. With synthesize, requests
+    that were never recorded get a recorded response picked deterministically by
+    their digest, so rosters of any size replay offline.
+    """
+
+    def __init__(self, path, latency=0.0, synthesize=False):
+        self.latency = latency
+        self.synthesize = synthesize
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index = {}
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(self._data):
+            digest, status, length = RECORD_HEADER.unpack_from(self._data, offset)
+            self.index[digest] = (status, offset + RECORD_HEADER.size, length)  # last recording wins
+            offset += RECORD_HEADER.size + length
+        self.digests = sorted(self.index)
+
+    def handle_request(self, request):
+        if self.latency:
+            time.sleep(self.latency)
+        digest = request_digest(request)
+        entry = self.index.get(digest)
+        if entry is None and self.synthesize and self.digests:
+            entry = self.index[self.digests[int.from_bytes(digest[:8], "little") % len(self.digests)]]
+        if entry is None:
+            return httpx.Response(404, json={"errors": [{"message": "request not in recording"}]})
+        status, start, length = entry
+        body = zlib.decompress(self._data[start:start + length])
+        return httpx.Response(status, headers={"content-type": "application/json"}, content=body)
+
+    def close(self):
+        self._data.close()
+
+
+def fetch_profile(client, username, extended=False, api_url=LEETCODE_API_URL):
+    """Fetch one profile with an httpx client; failures come back as a result with an "error" key"""
+    query = EXTENDED_PROFILE_QUERY if extended else USER_PROFILE_QUERY
+    try:
+        response = client.post(
+            api_url,
+            json={"query": query, "variables": {"username": username}}
+        )
+        
+        if response.status_code == 200:
+            data = response.json().get("data") or {}
+            user = data.get("matchedUser")
+            if user:
+                submissions = user["submitStats"]["acSubmissionNum"]
+                easy = next((i["count"] for i in submissions if i["difficulty"] == "Easy"), 0)
+                medium = next((i["count"] for i in submissions if i["difficulty"] == "Medium"), 0)
+                hard = next((i["count"] for i in submissions if i["difficulty"] == "Hard"), 0)
+                # Calculate total correctly by adding the individual difficulty counts
+                total = easy + medium + hard
+                
+                result = {
+                    "found": True,
+                    "total_solved": total,
+                    "easy": easy,
+                    "medium": medium,
+                    "hard": hard
+                }
+
+                if extended:
+                    # Derive metrics once here so the UI never recomputes them
+                    result["extended"] = compute_derived_metrics(
+                        user.get("submissionCalendar"),
+                        submissions,
+                        user["submitStats"].get("totalSubmissionNum"),
+                        user.get("languageProblemCount"),
+                        data.get("recentAcSubmissionList")
+                    )
+                    contest = data.get("userContestRanking") or {}
+                    result["extended"].update({
+                        "contest_rating": int(round(contest.get("rating") or 0)),
+                        "contest_ranking": contest.get("globalRanking") or 0,
+                        "contests_attended": contest.get("attendedContestsCount") or 0
+                    })
+                return result
+            return {"found": False, "total_solved": 0, "easy": 0, "medium": 0, "hard": 0}
+        # Non-200 (throttling, server errors) says nothing about the profile itself
+        return {"found": False, "total_solved": 0, "easy": 0, "medium": 0, "hard": 0,
+                "error": f"HTTP {response.status_code}"}
+    except httpx.TimeoutException as e:
+        return {"found": False, "total_solved": 0, "easy": 0, "medium": 0, "hard": 0,
+                "error": f"timeout: {e}"}
+    except Exception as e:
+        return {"found": False, "total_solved": 0, "easy": 0, "medium": 0, "hard": 0,
+                "error": str(e)}
+
+
+# Distributed fetching: a coordinator hands out shards of usernames over HTTP,
+# headless workers (python main.py --worker URL) fetch them and post results
+# back. A shard whose worker stops reporting within the lease is handed out
+# again, so a lost worker only delays its shard. Every request carries the
+# coordinator's shared token: results end up in the cache dashboards trust.
+
+class FetchCoordinator:
+    """Serves username shards to fetch workers and merges their results"""
+
+    def __init__(self, usernames, extended=False, shard_size=50, lease=60.0, host="127.0.0.1", port=0,
+                 token=None):
+        keys = list(dict.fromkeys(filter(None, map(normalize_username, usernames))))
+        self.extended = extended
+        self.token = token or secrets.token_urlsafe(16)
+        self.lease = lease
+        self.shards = {
+            n: {"pending": set(keys[i:i + shard_size]), "worker": None, "expires": 0.0}
+            for n, i in enumerate(range(0, len(keys), shard_size))
+        }
+        self.queue = deque(self.shards)
+        self.results = {}
+        self.workers = Counter()  # worker -> results delivered
+        self.reissued = 0
+        self.lock = Lock()
+        self.finished = Condition(self.lock)
+
+        self.server = ThreadingHTTPServer((host, port), CoordinatorHandler)
+        self.server.daemon_threads = True
+        self.server.coordinator = self
+        host, port = self.server.server_address[:2]
+        if host in ("0.0.0.0", "::", ""):
+            host = platform.node() or "localhost"  # listening everywhere - advertise a reachable name
+        self.url = f"http://{host}:{port}"
+
+    def start(self):
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def done(self):
+        return all(not shard["pending"] for shard in self.shards.values())
+
+    def lease_shard(self, worker):
+        with self.lock:
+            now = time.time()
+            # Hand out shards whose worker went quiet again
+            for n, shard in self.shards.items():
+                if shard["pending"] and shard["worker"] and shard["expires"] < now:
+                    shard["worker"] = None
+                    self.queue.append(n)
+                    self.reissued += 1
+            while self.queue:
+                shard_id = self.queue.popleft()
+                shard = self.shards[shard_id]
+                if shard["pending"] and shard["worker"] is None:
+                    shard["worker"] = worker
+                    shard["expires"] = now + self.lease
+                    return {"shard": shard_id, "usernames": sorted(shard["pending"]), "extended": self.extended}
+            return {"done": True} if self.done() else {"wait": min(1.0, self.lease / 4)}
+
+    def submit(self, worker, shard_id, results):
+        with self.lock:
+            shard = self.shards.get(shard_id)
+            if shard is None:
+                return {"accepted": 0}
+            # First answer per username wins; late results from a presumed-lost worker are dropped
+            accepted = 0
+            for key, result in results.items():
+                if key in shard["pending"]:
+                    shard["pending"].discard(key)
+                    self.results[key] = result
+                    accepted += 1
+            self.workers[worker] += accepted
+            if shard["worker"] == worker:
+                shard["expires"] = time.time() + self.lease  # results double as a heartbeat
+            if self.done():
+                self.finished.notify_all()
+            return {"accepted": accepted}
+
+    def wait(self, timeout=None):
+        """Block until every shard is complete; returns {username: result}"""
+        with self.lock:
+            self.finished.wait_for(self.done, timeout)
+            return dict(self.results)
+
+    def status(self):
+        with self.lock:
+            remaining = sum(len(shard["pending"]) for shard in self.shards.values())
+            return {"results": len(self.results), "remaining": remaining,
+                    "workers": dict(self.workers), "reissued": self.reissued}
+
+
+class CoordinatorHandler(BaseHTTPRequestHandler):
+    """POST /lease {"worker"}, POST /results {"worker", "shard", "results"}, GET /status
+
+    Every request needs "Authorization: Bearer <token>".
+    """
+
+    def _authorized(self):
+        expected = f"Bearer {self.server.coordinator.token}"
+        if hmac.compare_digest(self.headers.get("Authorization", ""), expected):
+            return True
+        self._reply({"error": "unauthorized"}, 401)
+        return False
+
+    def _reply(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path == "/status":
+            return self._reply(self.server.coordinator.status())
+        self._reply({"error": "not found"}, 404)
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError:
+            return self._reply({"error": "invalid JSON"}, 400)
+        coordinator = self.server.coordinator
+        worker = payload.get("worker") or self.client_address[0]
+        if self.path == "/lease":
+            return self._reply(coordinator.lease_shard(worker))
+        if self.path == "/results":
+            return self._reply(coordinator.submit(worker, payload.get("shard"), payload.get("results") or {}))
+        self._reply({"error": "not found"}, 404)
+
+    def log_message(self, format, *args):
+        pass  # a line per request would drown the console
+
+
+def run_fetch_worker(coordinator_url, token, api_url=LEETCODE_API_URL, transport=None, worker=None,
+                     concurrency=5, batch=10):
+    """Pull shards from a coordinator until it reports done; returns the number of profiles fetched"""
+    worker = worker or f"{platform.node()}-{os.getpid()}"
+    fetched = 0
+    with httpx.Client(timeout=30.0, headers={"Authorization": f"Bearer {token}"}) as control, \
+            httpx.Client(transport=transport, timeout=10.0) as api, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            response = control.post(f"{coordinator_url}/lease", json={"worker": worker})
+            response.raise_for_status()  # e.g. 401 - wrong --token
+            lease = response.json()
+            if lease.get("done"):
+                return fetched
+            if "wait" in lease:
+                time.sleep(lease["wait"])
+                continue
+            futures = {
+                executor.submit(fetch_profile, api, username, lease["extended"], api_url): username
+                for username in lease["usernames"]
+            }
+            # Stream results back in small batches; they also keep the lease alive
+            results = {}
+            for i, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                if len(results) >= batch or i == len(futures):
+                    control.post(f"{coordinator_url}/results",
+                                 json={"worker": worker, "shard": lease["shard"], "results": results})
+                    fetched += len(results)
+                    results = {}
+
+
+class Workspace:
+    """Several rosters (sections) loaded at once, sharing one FetchStore"""
+
+    def __init__(self):
+        self.rosters = {}
+        self.store = FetchStore()
+        self._by_username = {}
+        self._by_id = {}
+        self._ids = count(1)
+
+    def add_roster(self, section, students):
+        # Stable row IDs - also used as Treeview iids
+        for student in students:
+            student["section"] = section
+            student["student_id"] = f"s{next(self._ids)}"
+        replacing = section in self.rosters
+        self.rosters[section] = students
+        if replacing:
+            self._reindex()
+        else:
+            self._index(students)
+
+    def patch_roster(self, section, students, added, removed, renamed, updates=()):
+        """Swap in an edited roster (see diff_roster), re-indexing only the changed rows"""
+        for student, fields in updates:
+            student.update(fields)
+        for student in added:
+            student["section"] = section
+            student["student_id"] = f"s{next(self._ids)}"
+        self.rosters[section] = students
+        for student in removed:
+            self._by_id.pop(student["student_id"], None)
+            self._unindex_username(student, normalize_username(student.get("leetcode_username")))
+        for student, old_key in renamed:
+            self._unindex_username(student, old_key)
+            key = normalize_username(student.get("leetcode_username"))
+            if key:
+                self._by_username.setdefault(key, []).append(student)
+        self._index(added)
+
+    def _unindex_username(self, student, key):
+        matches = self._by_username.get(key)
+        if matches and student in matches:
+            matches.remove(student)
+            if not matches:
+                del self._by_username[key]
+
+    def clear(self):
+        self.rosters.clear()
+        self._by_username.clear()
+        self._by_id.clear()
+
+    def _reindex(self):
+        self._by_username = {}
+        self._by_id = {}
+        self._index(self.students())
+
+    def _index(self, students):
+        for student in students:
+            self._by_id[student["student_id"]] = student
+            key = normalize_username(student.get("leetcode_username"))
+            if key:
+                self._by_username.setdefault(key, []).append(student)
+
+    def usernames(self):
+        """Normalized usernames of every loaded student"""
+        return list(self._by_username)
+
+    def student_by_id(self, student_id):
+        return self._by_id.get(student_id)
+
+    def students_with_username(self, username):
+        """Every record (across sections) sharing this username"""
+        return self._by_username.get(normalize_username(username), [])
+
+    def sections(self):
+        return list(self.rosters)
+
+    def unique_section(self, name):
+        """name, or "name (2)", "name (3)", ... if a loaded section already uses it"""
+        section, n = name, 1
+        while section in self.rosters:
+            n += 1
+            section = f"{name} ({n})"
+        return section
+
+    def students(self, section=None):
+        """Students of one section, or of every section when section is None"""
+        if section is not None:
+            return list(self.rosters.get(section, []))
+        return [student for students in self.rosters.values() for student in students]
+
+    def pending_usernames(self, students, extended=False):
+        """Unique usernames among students that the store has no result for"""
+        pending = {}
+        for student in students:
+            key = normalize_username(student.get("leetcode_username"))
+            if key and key not in pending and self.store.needs_fetch(key, extended):
+                pending[key] = student["leetcode_username"]
+        return pending
+
+    def invalid_students(self, section=None):
+        """Loaded students whose profile was not found, in roster order (from the store's index)"""
+        students = [
+            student
+            for key in self.store.invalid_usernames()
+            for student in self._by_username.get(key, [])
+            if section is None or student["section"] == section
+        ]
+        students.sort(key=lambda s: int(s["student_id"][1:]))
+        return students
+
+    def section_aggregates(self):
+        """Per-section mean/median/count and bucket distribution using grouped operations"""
+        frames = [
+            pd.DataFrame({
+                "section": section,
+                "problems_solved": [s.get("problems_solved", 0) for s in students]
+            })
+            for section, students in self.rosters.items() if students
+        ]
+        if not frames:
+            return None, None
+        df = pd.concat(frames, ignore_index=True)
+        df["problems_solved"] = pd.to_numeric(df["problems_solved"], errors="coerce").fillna(0)
+
+        grouped = df.groupby("section", sort=False)["problems_solved"]
+        summary = grouped.agg(["mean", "median", "count"])
+
+        df["bucket"] = pd.cut(df["problems_solved"], PROGRESS_BIN_EDGES, labels=PROGRESS_LABELS)
+        distribution = pd.crosstab(df["section"], df["bucket"]).reindex(
+            index=summary.index, columns=PROGRESS_LABELS, fill_value=0
+        )
+        return summary, distribution
+
+
+# Native snapshot: magic, header length, JSON header, then 64-byte aligned
+# column arrays. String columns are uint32 indices into one shared string
+# table, stored as a single NUL-separated UTF-8 blob.
+SNAPSHOT_MAGIC = b"LCSNAP01"
+SNAPSHOT_EXTENSION = ".lcsnap"
+SNAPSHOT_STRING_FIELDS = StudentRecord.ROSTER_FIELDS + ("section", "top_language", "languages", "last_accepted")
+SNAPSHOT_INT_FIELDS = StudentRecord.COUNT_FIELDS + (
+    "contest_rating", "contest_ranking", "contests_attended", "current_streak", "max_streak",
+    "active_days_7", "active_days_30", "submissions_7", "submissions_30", "recent_accepted"
+)
+
+
+def result_from_record(student):
+    """Rebuild the fetch result a record was filled from (inverse of apply_fetch_result)"""
+    result = {
+        "found": bool(student.get("profile_found")),
+        "total_solved": student.get("problems_solved", 0),
+        "easy": student.get("easy_count", 0),
+        "medium": student.get("medium_count", 0),
+        "hard": student.get("hard_count", 0)
+    }
+    if student.extended is not None:
+        result["extended"] = {field: student.get(field, default) for field, default in EXTENDED_DEFAULTS.items()}
+    return result
+
+
+def save_snapshot(file_path, students, store, last_update_time=None):
+    """Write enriched students to a memory-mappable columnar snapshot"""
+    n = len(students)
+    strings = {}
+    arrays = {}
+    for field in SNAPSHOT_STRING_FIELDS:
+        arrays[field] = np.fromiter(
+            (strings.setdefault(student.get(field) or "", len(strings)) for student in students),
+            dtype=np.uint32, count=n)
+    for field in SNAPSHOT_INT_FIELDS:
+        arrays[field] = np.fromiter((student.get(field) or 0 for student in students), dtype=np.int64, count=n)
+    arrays["acceptance_rate"] = np.fromiter(
+        (student.get("acceptance_rate") or 0.0 for student in students), dtype=np.float64, count=n)
+    arrays["profile_found"] = np.fromiter(
+        (bool(student.get("profile_found")) for student in students), dtype=np.uint8, count=n)
+    arrays["has_extended"] = np.fromiter(
+        (student.extended is not None for student in students), dtype=np.uint8, count=n)
+    fetched = (store.fetched_at(student.get("leetcode_username")) for student in students)
+    arrays["fetched_at"] = np.fromiter(
+        (ts.timestamp() if ts else np.nan for ts in fetched), dtype=np.float64, count=n)
+
+    arrays["_strings"] = np.frombuffer("\x00".join(strings).encode("utf-8"), dtype=np.uint8)
+
+    # Lay out arrays relative to the (aligned) start of the data section
+    layout = {}
+    position = 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": array.dtype.str, "offset": position, "length": len(array)}
+        position += -(-array.nbytes // 64) * 64
+    header = json.dumps({
+        "version": 1,
+        "rows": n,
+        "last_update": last_update_time.isoformat() if last_update_time else None,
+        "arrays": layout
+    }).encode("utf-8")
+    data_start = -(-(len(SNAPSHOT_MAGIC) + 8 + len(header)) // 64) * 64
+
+    with open(file_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + position)
+
+
+def load_snapshot(file_path):
+    """Memory-map a snapshot; returns ({section: records}, {username: (fetched_at, record)}, last_update)"""
+    # Bulk object creation - the cyclic GC would otherwise rescan the growing heap repeatedly
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _load_snapshot(file_path)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _load_snapshot(file_path):
+    mm = np.memmap(file_path, dtype=np.uint8, mode="r")
+    if bytes(mm[:len(SNAPSHOT_MAGIC)]) != SNAPSHOT_MAGIC:
+        raise ValueError("Not a dashboard snapshot file")
+    header_start = len(SNAPSHOT_MAGIC) + 8
+    header_length = int(mm[len(SNAPSHOT_MAGIC):header_start].view("<u8")[0])
+    header = json.loads(bytes(mm[header_start:header_start + header_length]))
+    data_start = -(-(header_start + header_length) // 64) * 64
+
+    def column(name):
+        spec = header["arrays"][name]
+        dtype = np.dtype(spec["dtype"])
+        begin = data_start + spec["offset"]
+        return mm[begin:begin + spec["length"] * dtype.itemsize].view(dtype)
+
+    # Decode the shared string table once; columns only hold indices into it
+    table = column("_strings").tobytes().decode("utf-8").split("\x00")
+
+    names, usernames, rolls, emails, phones, sections_column = (
+        [table[i] for i in column(field).tolist()] for field in SNAPSHOT_STRING_FIELDS[:6])
+    counts = zip(*(column(field).tolist() for field in StudentRecord.COUNT_FIELDS))
+    found = column("profile_found").astype(bool).tolist()
+    has_extended = column("has_extended").tolist()
+    fetched_at = column("fetched_at").tolist()
+
+    sections = {}
+    fetched = {}
+    extended_rows = []
+    rows = zip(names, usernames, rolls, emails, phones, sections_column, counts, found, fetched_at)
+    for i, (name, username, roll, email, phone, section, count_values, profile_found, ts) in enumerate(rows):
+        record = StudentRecord.__new__(StudentRecord)
+        record.name, record.leetcode_username, record.roll_number = name, username, roll
+        record.email, record.phone = email, phone
+        record.problems_solved, record.easy_count, record.medium_count, record.hard_count = count_values
+        record.profile_found = profile_found
+        record.extended = None
+        if has_extended[i]:
+            extended_rows.append((i, record))
+        sections.setdefault(section, []).append(record)
+        if username and ts == ts:  # NaN = never fetched
+            # The store converts the record to a fetch result only when asked
+            fetched[username.lower()] = (datetime.fromtimestamp(ts), record)
+
+    # Extended metrics only for the rows that have them
+    if extended_rows:
+        index = np.array([i for i, _ in extended_rows])
+        values = {field: column(field)[index].tolist() for field in EXTENDED_DEFAULTS}
+        for field in SNAPSHOT_STRING_FIELDS[6:]:
+            values[field] = [table[i] for i in values[field]]
+        for j, (_, record) in enumerate(extended_rows):
+            stats = ExtendedStats()
+            for field, column_values in values.items():
+                setattr(stats, field, column_values[j])
+            record.extended = stats
+
+    last_update = header.get("last_update")
+    return sections, fetched, datetime.fromisoformat(last_update) if last_update else None
+
+
+class FilterError(ValueError):
+    """Raised for filter expressions that cannot be parsed or evaluated"""
+
+
+class FilterSyntaxError(FilterError):
+    """The query is not a filter expression at all (the search box treats it as plain text)"""
+
+
+class FilterEngine:
+    """Compiles filter expressions such as  hard>=10 and profile:valid and name~"gu"
+    into boolean numpy masks over columnar copies of the students.
+
+    Columns and per-clause masks are cached until the student list or its data changes.
+    Given the FetchStore, profile:invalid and profile:error come from its indexes, so they
+    agree with "Invalid Profiles Only".
+    """
+
+    NUMERIC_FIELDS = {
+        "total": "problems_solved", "solved": "problems_solved",
+        "easy": "easy_count", "medium": "medium_count", "hard": "hard_count",
+        "rating": "contest_rating", "ranking": "contest_ranking", "contests": "contests_attended",
+        "streak": "current_streak", "max_streak": "max_streak",
+        "active7": "active_days_7", "active30": "active_days_30",
+        "acceptance": "acceptance_rate",
+    }
+    TEXT_FIELDS = {
+        "name": "name", "username": "leetcode_username", "user": "leetcode_username",
+        "roll": "roll_number", "email": "email", "phone": "phone",
+        "section": "section", "language": "top_language",
+    }
+    # Plain words search the same fields the original search box did
+    FREE_TEXT_FIELDS = ("name", "leetcode_username", "roll_number", "email")
+    TOKEN_RE = re.compile(r'\s*(?:(?P<string>"[^"]*"|\'[^\']*\')|(?P<op>>=|<=|!=|==|=|>|<|~|:)'
+                          r'|(?P<paren>[()])|(?P<word>[^\s()<>=!~:"\']+))')
+
+    def __init__(self, store=None):
+        self.store = store
+        self.students = []
+        self.key = None
+        self.columns = {}
+        self.masks = {}
+
+    def filter(self, students, version, expression):
+        """Students matching expression; version identifies the current record data"""
+        key = (id(students), len(students), version)
+        if key != self.key:
+            self.students, self.key = students, key
+            self.columns, self.masks = {}, {}
+        self.tokens = self._tokenize(expression)
+        self.position = 0
+        mask = self._parse_or()
+        if self.position < len(self.tokens):
+            raise FilterSyntaxError(f"Unexpected '{self.tokens[self.position][1]}'")
+        return [students[i] for i in np.flatnonzero(mask)]
+
+    def search(self, students, version, query):
+        """Search-box semantics: a filter expression, or else the whole query as plain text"""
+        try:
+            return self.filter(students, version, query)
+        except FilterSyntaxError:
+            # d'souza, "x.com:", a trailing "and" - match it like the original search box did
+            mask = self._clause(None, "~", query.strip())
+            return [students[i] for i in np.flatnonzero(mask)]
+
+    # Columns ----------------------------------------------------------------
+    def _numeric(self, field):
+        if field not in self.columns:
+            self.columns[field] = np.fromiter(
+                (student.get(field) or 0 for student in self.students), dtype=np.float64, count=len(self.students))
+        return self.columns[field]
+
+    def _text(self, field):
+        if field not in self.columns:
+            self.columns[field] = pd.Series(
+                [student.get(field) or "" for student in self.students], dtype=object).str.lower()
+        return self.columns[field]
+
+    def _username_in(self, keys):
+        keys = set(keys)
+        return np.fromiter((normalize_username(student.get("leetcode_username")) in keys
+                            for student in self.students), dtype=bool, count=len(self.students))
+
+    # Parsing ----------------------------------------------------------------
+    def _tokenize(self, expression):
+        tokens = []
+        position = 0
+        expression = expression.strip()
+        while position < len(expression):
+            match = self.TOKEN_RE.match(expression, position)
+            if not match or match.end() == position:
+                raise FilterSyntaxError(f"Cannot parse near '{expression[position:]}'")
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == "string":
+                value = value[1:-1]
+            elif kind == "word" and value.lower() in ("and", "or", "not"):
+                kind, value = "keyword", value.lower()
+            tokens.append((kind, value))
+            position = match.end()
+        if not tokens:
+            raise FilterSyntaxError("Empty filter")
+        return tokens
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def _next(self):
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def _parse_or(self):
+        mask = self._parse_and()
+        while self._peek() == ("keyword", "or"):
+            self._next()
+            mask = mask | self._parse_and()
+        return mask
+
+    def _parse_and(self):
+        mask = self._parse_not()
+        while True:
+            token = self._peek()
+            if token == ("keyword", "and"):
+                self._next()
+            elif token[0] is None or token == ("keyword", "or") or token == ("paren", ")"):
+                return mask
+            # Juxtaposed clauses are ANDed too: "hard>=5 section:A"
+            mask = mask & self._parse_not()
+
+    def _parse_not(self):
+        if self._peek() == ("keyword", "not"):
+            self._next()
+            return ~self._parse_not()
+        return self._parse_atom()
+
+    def _parse_atom(self):
+        kind, value = self._next()
+        if (kind, value) == ("paren", "("):
+            mask = self._parse_or()
+            if self._next() != ("paren", ")"):
+                raise FilterSyntaxError("Missing ')'")
+            return mask
+        if kind not in ("word", "string"):
+            raise FilterSyntaxError(f"Unexpected '{value}'" if value else "Incomplete filter")
+        if kind == "word" and self._peek()[0] == "op":
+            _, op = self._next()
+            value_kind, operand = self._next()
+            if value_kind not in ("word", "string"):
+                raise FilterSyntaxError(f"Missing value after '{value}{op}'")
+            return self._clause(value.lower(), op, operand)
+        return self._clause(None, "~", value)
+
+    # Clauses ----------------------------------------------------------------
+    def _clause(self, name, op, operand):
+        key = (name, "=" if op in ("=", "==", ":") else op, operand.lower())
+        if key not in self.masks:
+            self.masks[key] = self._evaluate(*key)
+        return self.masks[key]
+
+    def _evaluate(self, name, op, operand):
+        if name is None:
+            mask = np.zeros(len(self.students), dtype=bool)
+            for field in self.FREE_TEXT_FIELDS:
+                mask |= self._text(field).str.contains(operand, regex=False).values
+            return mask
+
+        if name == "profile":
+            found = self._numeric("profile_found") > 0
+            has_username = self._text("leetcode_username").values != ""
+            masks = {"valid": found, "missing": ~has_username, "any": has_username}
+            if self.store is not None:
+                # Not found vs. fetch failed (timeouts, 5xx) - the store indexes both
+                masks["invalid"] = self._username_in(self.store.invalid_usernames())
+                masks["error"] = self._username_in(self.store.error_usernames())
+            else:
+                masks["invalid"] = has_username & ~found
+            if op != "=" or operand not in masks:
+                raise FilterError("Use profile:valid, profile:invalid, profile:error, "
+                                  "profile:missing or profile:any")
+            return masks[operand]
+
+        if name in self.NUMERIC_FIELDS:
+            try:
+                number = float(operand)
+            except ValueError:
+                raise FilterError(f"'{name}' needs a number, got '{operand}'") from None
+            column = self._numeric(self.NUMERIC_FIELDS[name])
+            comparisons = {"=": np.equal, "!=": np.not_equal, ">": np.greater,
+                           ">=": np.greater_equal, "<": np.less, "<=": np.less_equal}
+            if op not in comparisons:
+                raise FilterError(f"'{op}' does not apply to number field '{name}'")
+            return comparisons[op](column, number)
+
+        if name in self.TEXT_FIELDS:
+            column = self._text(self.TEXT_FIELDS[name])
+            if op == "~":
+                return column.str.contains(operand, regex=False).values
+            if op == "=":
+                return (column == operand).values
+            if op == "!=":
+                return (column != operand).values
+            raise FilterError(f"'{op}' does not apply to text field '{name}'")
+
+        raise FilterError(f"Unknown field '{name}'")
+
+
+class Leaderboard:
+    """Ranks students with valid profiles by a score.
+
+    Entries live in a sorted list of (-score, student_id) and are moved one
+    student at a time as refreshes arrive, instead of re-sorting everyone.
+    """
+
+    def __init__(self, metric="total", weights=(1, 2, 3), dense=False):
+        self.metric = metric
+        self.weights = weights
+        self.dense = dense
+        self.population = set()  # IDs eligible for ranking (the loaded student list)
+        self.scores = {}
+        self.entries = []
+        self.counts = Counter()
+        self.distinct = []  # sorted negated distinct scores, for dense ranks
+
+    def score(self, student):
+        if self.metric == "weighted":
+            easy, medium, hard = self.weights
+            return (easy * student.get("easy_count", 0) + medium * student.get("medium_count", 0) +
+                    hard * student.get("hard_count", 0))
+        return student.get("problems_solved", 0)
+
+    def rebuild(self, students):
+        self.population = {student["student_id"] for student in students}
+        self.scores = {student["student_id"]: self.score(student)
+                       for student in students if student.get("profile_found")}
+        self.entries = sorted((-score, student_id) for student_id, score in self.scores.items())
+        self.counts = Counter(self.scores.values())
+        self.distinct = sorted(-score for score in self.counts)
+
+    def _add(self, student_id, score):
+        insort(self.entries, (-score, student_id))
+        self.scores[student_id] = score
+        self.counts[score] += 1
+        if self.counts[score] == 1:
+            insort(self.distinct, -score)
+            return True
+        return False
+
+    def _remove(self, student_id):
+        score = self.scores.pop(student_id)
+        del self.entries[bisect_left(self.entries, (-score, student_id))]
+        self.counts[score] -= 1
+        if not self.counts[score]:
+            del self.counts[score]
+            del self.distinct[bisect_left(self.distinct, -score)]
+            return True
+        return False
+
+    def update(self, student):
+        """Re-rank one student; returns the IDs whose rank may have changed"""
+        student_id = student["student_id"]
+        if student_id not in self.population:
+            return []
+        old = self.scores.get(student_id)
+        new = self.score(student) if student.get("profile_found") else None
+        if old == new:
+            return []
+
+        distinct_changed = False
+        if old is not None:
+            distinct_changed |= self._remove(student_id)
+        if new is not None:
+            distinct_changed |= self._add(student_id, new)
+
+        # Only entries scored between the old and new score move - unless the
+        # population or (for dense ranks) the set of distinct scores changed
+        scores = [score for score in (old, new) if score is not None]
+        low = bisect_left(self.entries, (-max(scores), ""))
+        if old is None or new is None or (self.dense and distinct_changed):
+            high = len(self.entries)
+        else:
+            high = bisect_right(self.entries, (-min(scores), "\uffff"))
+        affected = [entry[1] for entry in self.entries[low:high]]
+        if new is None:
+            affected.append(student_id)
+        return affected
+
+    def add(self, student):
+        """Rank a newly loaded student; returns the IDs whose rank may have changed"""
+        self.population.add(student["student_id"])
+        return self.update(student)
+
+    def remove(self, student_id):
+        """Drop an unloaded student; returns the IDs whose rank may have changed"""
+        self.population.discard(student_id)
+        if student_id not in self.scores:
+            return []
+        score = self.scores[student_id]
+        if self._remove(student_id) or not self.dense:
+            # Everyone scored below moves up one place
+            return [entry[1] for entry in self.entries[bisect_right(self.entries, (-score, "\uffff")):]]
+        return []
+
+    def rank(self, student_id):
+        score = self.scores.get(student_id)
+        if score is None:
+            return None
+        if self.dense:
+            return bisect_left(self.distinct, -score) + 1
+        return bisect_left(self.entries, (-score, "")) + 1
+
+    def percentile(self, student_id):
+        """Percentile rank: share of ranked students below, counting ties as half"""
+        score = self.scores.get(student_id)
+        if score is None or not self.entries:
+            return None
+        below = len(self.entries) - bisect_right(self.entries, (-score, "\uffff"))
+        return round(100.0 * (below + 0.5 * self.counts[score]) / len(self.entries), 1)
+
+    def top(self, k):
+        return [entry[1] for entry in self.entries[:k]]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class ViewAggregates:
+    """Running chart inputs for the displayed students.
+
+    Keeps progress-bucket counts, per-difficulty sums and a sorted list of
+    (-problems solved, roster order, student_id) for the top-N charts. One
+    student's change, or a filter adding/removing rows, costs O(changed rows)
+    instead of a pass over the whole view.
+    """
+
+    def __init__(self):
+        self.members = {}  # student_id -> student
+        self.values = {}  # student_id -> (total, easy, medium, hard, bucket)
+        self.bins = [0] * len(PROGRESS_LABELS)
+        self.sums = [0, 0, 0, 0]  # total, easy, medium, hard
+        self.ranked = []
+
+    @staticmethod
+    def _values(student):
+        total = student.get("problems_solved", 0)
+        return (total, student.get("easy_count", 0), student.get("medium_count", 0),
+                student.get("hard_count", 0), bisect_right(PROGRESS_BIN_EDGES, total) - 1)
+
+    @staticmethod
+    def _order(student_id):
+        return int(student_id[1:])
+
+    def reset(self):
+        self.__init__()
+
+    def rebuild(self, students):
+        self.reset()
+        self.members = {student["student_id"]: student for student in students}
+        self.values = {student_id: self._values(student) for student_id, student in self.members.items()}
+        for values in self.values.values():
+            self._count(values, 1)
+        self.ranked = sorted((-values[0], self._order(student_id), student_id)
+                             for student_id, values in self.values.items())
+
+    def _count(self, values, sign):
+        self.bins[values[4]] += sign
+        for i in range(4):
+            self.sums[i] += sign * values[i]
+
+    def add(self, student):
+        student_id = student["student_id"]
+        if student_id in self.members:
+            return
+        values = self._values(student)
+        self.members[student_id] = student
+        self.values[student_id] = values
+        self._count(values, 1)
+        insort(self.ranked, (-values[0], self._order(student_id), student_id))
+
+    def remove(self, student_id):
+        if student_id not in self.members:
+            return
+        del self.members[student_id]
+        values = self.values.pop(student_id)
+        self._count(values, -1)
+        del self.ranked[bisect_left(self.ranked, (-values[0], self._order(student_id), student_id))]
+
+    def update(self, student):
+        """Re-read one student's counts; returns True if the aggregates changed"""
+        student_id = student["student_id"]
+        old = self.values.get(student_id)
+        if old is None:
+            return False
+        new = self._values(student)
+        if new == old:
+            return False
+        self.remove(student_id)
+        self.add(student)
+        return True
+
+    def set_members(self, students):
+        """Make the view exactly these students, adding/subtracting only the difference"""
+        wanted = {student["student_id"]: student for student in students}
+        removed = [student_id for student_id in self.members if student_id not in wanted]
+        added = [student for student_id, student in wanted.items() if student_id not in self.members]
+        if len(removed) + len(added) >= len(wanted):
+            self.rebuild(students)  # mostly new rows - a fresh build is cheaper
+            return
+        for student_id in removed:
+            self.remove(student_id)
+        for student in added:
+            self.add(student)
+
+    def means(self):
+        """Mean total/easy/medium/hard over the view"""
+        n = len(self.members)
+        return [value / n if n else 0.0 for value in self.sums]
+
+    def top(self, k):
+        return [self.members[entry[2]] for entry in self.ranked[:k]]
+
+    # Same shapes as the module-level *_chart_data helpers
+    def total_chart_data(self, limit=15):
+        return total_chart_data(self.top(limit), limit)
+
+    def difficulty_chart_data(self, limit=10):
+        return difficulty_chart_data(self.top(limit), limit)
+
+    def progress_chart_data(self):
+        return (list(self.bins),)
+
+    def __len__(self):
+        return len(self.members)
+
+
+class RefreshScheduler:
+    """Periodically refreshes the loaded students, spreading fetches evenly over the interval"""
+
+    def __init__(self, app, interval_minutes=30):
+        self.app = app
+        self.interval = interval_minutes * 60
+        self.queue = []
+        self.job = None
+        self.running = False
+        self.cycle_start = None
+        self.in_flight = None  # future of the fetch started by the last tick
+        # One fetch at a time - the point is a flat, predictable request rate
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def set_interval(self, minutes):
+        self.interval = max(1, minutes) * 60
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self._start_cycle()
+
+    def stop(self):
+        self.running = False
+        self.queue = []
+        if self.job is not None:
+            self.app.root.after_cancel(self.job)
+            self.job = None
+
+    def _due_usernames(self):
+        """Usernames not fetched within the last half interval; not-found ones once their negative TTL runs out"""
+        now = datetime.now()
+        store = self.app.workspace.store
+        invalid = set(store.invalid_usernames())
+        due = []
+        for username in self.app.workspace.usernames():
+            if username in invalid:
+                if store.needs_fetch(username):
+                    due.append(username)
+                continue
+            fetched_at = store.fetched_at(username)
+            if fetched_at is None or (now - fetched_at).total_seconds() >= self.interval / 2:
+                due.append(username)
+        return due
+
+    def _start_cycle(self):
+        if not self.running:
+            return
+        self.cycle_start = datetime.now()
+        self.queue = self._due_usernames()
+        self.cycle_size = len(self.queue)
+        self.spacing_ms = int(1000 * self.interval / max(1, len(self.queue)))
+        self._tick()
+
+    def _tick(self):
+        self.job = None
+        if not self.running:
+            return
+        if not self.queue:
+            # Wait out the rest of the interval before starting the next cycle
+            if self.cycle_size:
+                self.app.root.after(0, self.app.on_refresh_cycle_done)
+            elapsed = (datetime.now() - self.cycle_start).total_seconds()
+            self.job = self.app.root.after(int(1000 * max(1, self.interval - elapsed)), self._start_cycle)
+            return
+
+        if self.in_flight is not None and not self.in_flight.done():
+            # A slow fetch (timeout, shared-cache wait) outlasted the spacing - wait for it
+            # rather than queueing fetches that would later drain in a burst
+            self.job = self.app.root.after(min(self.spacing_ms, 250), self._tick)
+            return
+
+        username = self.queue.pop(0)
+        extended = self.app.extended_var.get()
+        # Cached results older than the refresh spacing are what we are here to replace
+        future = self.executor.submit(self.app.fetch_leetcode_data, username, extended,
+                                      max_age=self.interval / 2)
+        future.add_done_callback(
+            lambda f, u=username: self.app.ui_events.post(self.app.on_refresh_result, u, f.result())
+        )
+        self.in_flight = future
+        self.job = self.app.root.after(self.spacing_ms, self._tick)
+
+
+class RosterWatcher:
+    """Re-ingests edited roster files, applying only the rows that changed.
+
+    The main thread stats each watched file every interval; a changed mtime
+    triggers a content hash (and, if the content really changed, a parse and
+    diff) on a worker thread.
+    """
+
+    def __init__(self, app, interval_ms=2000):
+        self.app = app
+        self.interval_ms = interval_ms
+        self.files = {}  # section -> [path, mtime_ns, sha1]
+        self.busy = set()
+        self.job = None
+
+    def watch(self, section, path):
+        try:
+            self.files[section] = [path, os.stat(path).st_mtime_ns, file_digest(path)]
+        except OSError:
+            pass
+
+    def clear(self):
+        self.files.clear()
+
+    def start(self):
+        if self.job is None:
+            self.job = self.app.root.after(self.interval_ms, self._poll)
+
+    def stop(self):
+        if self.job is not None:
+            self.app.root.after_cancel(self.job)
+            self.job = None
+
+    def _poll(self):
+        for section, entry in list(self.files.items()):
+            try:
+                mtime = os.stat(entry[0]).st_mtime_ns
+            except OSError:
+                continue  # mid-save or moved; try again next poll
+            if mtime != entry[1] and section not in self.busy:
+                self.busy.add(section)
+                Thread(target=self._reload, args=(section, entry, mtime), daemon=True).start()
+        self.job = self.app.root.after(self.interval_ms, self._poll)
+
+    def _reload(self, section, entry, mtime):
+        try:
+            digest = file_digest(entry[0])
+            if digest != entry[2]:
+                chunk = parse_roster_file(entry[0], self.app.roster_cache_dir)
+                if "error" in chunk:
+                    self.app.ui_events.progress(text=f"{os.path.basename(entry[0])}: {chunk['error']}")
+                    return
+                if not self.app.apply_roster_edit(section, chunk):
+                    return  # the section changed under us; diff again next poll
+            entry[1], entry[2] = mtime, digest
+        except Exception as e:
+            self.app.ui_events.progress(text=f"Could not reload {os.path.basename(entry[0])}: {e}")
+        finally:
+            self.busy.discard(section)
+
+
+class RenderScheduler:
+    """Coalesces display invalidations into a single render pass per idle cycle"""
+
+    def __init__(self, root, renderers):
+        self.root = root
+        self.renderers = renderers  # region -> (version key callable, render callable)
+        self.dirty = set()
+        self.rendered = {}
+        self.pending = None
+        self.after_render = None
+
+    def invalidate(self, *regions):
+        """Mark regions (all when none given) dirty and schedule one flush"""
+        self.dirty.update(regions or self.renderers)
+        if self.pending is None:
+            self.pending = self.root.after_idle(self.flush)
+
+    def flush(self):
+        self.pending = None
+        dirty, self.dirty = self.dirty, set()
+        for region, (version, render) in self.renderers.items():
+            if region not in dirty:
+                continue
+            # Skip regions whose inputs have not changed since their last render
+            key = version()
+            if self.rendered.get(region) == key:
+                continue
+            render()
+            self.rendered[region] = key
+        if self.after_render:
+            self.after_render()
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on in-flight profile fetches.
+
+    The limit grows by one after each full window of healthy completions
+    (p95 latency under target, few errors) and halves on timeouts, throttling
+    or server errors - at most once per window so one burst of 429s does not
+    collapse it to the floor.
+    """
+
+    def __init__(self, initial=5, min_limit=1, max_limit=32, target_p95=2.0, max_error_rate=0.1):
+        self.limit = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_p95 = target_p95
+        self.max_error_rate = max_error_rate
+        self.in_flight = 0
+        self.latencies = deque(maxlen=100)
+        self.outcomes = deque(maxlen=20)  # True = error; short so recovery is quick
+        self.healthy = 0  # completions since the last change
+        self.since_decrease = 0
+        self.cond = Condition()
+
+    @staticmethod
+    def is_congestion(result):
+        error = result.get("error") or ""
+        return error.startswith(("HTTP 429", "HTTP 5", "timeout"))
+
+    def p95(self):
+        if not self.latencies:
+            return 0.0
+        return float(np.percentile(self.latencies, 95))
+
+    def error_rate(self):
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def call(self, fetch, *args):
+        """Run fetch(*args) under the current limit and learn from its outcome"""
+        with self.cond:
+            while self.in_flight >= self.limit:
+                self.cond.wait()
+            self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            result = fetch(*args)
+            self.record(time.perf_counter() - start, result)
+            return result
+        finally:
+            # Release the slot even if fetch raised, or later calls would wait forever
+            with self.cond:
+                self.in_flight -= 1
+                self.cond.notify_all()
+
+    def record(self, latency, result):
+        with self.cond:
+            self.latencies.append(latency)
+            self.outcomes.append("error" in result)
+            self.since_decrease += 1
+            if self.is_congestion(result):
+                # Multiplicative decrease, once per window of completions
+                if self.since_decrease >= self.limit:
+                    self.limit = max(self.min_limit, self.limit // 2)
+                    self.since_decrease = 0
+                self.healthy = 0
+            elif self.p95() > self.target_p95 or self.error_rate() > self.max_error_rate:
+                self.healthy = 0
+            else:
+                self.healthy += 1
+                # Additive increase once a whole window came back healthy
+                if self.healthy >= self.limit:
+                    self.limit = min(self.max_limit, self.limit + 1)
+                    self.healthy = 0
+            self.cond.notify_all()
+
+    def describe(self):
+        with self.cond:
+            return (f"concurrency {self.limit} ({self.in_flight} in flight), "
+                    f"p95 {self.p95():.2f}s, errors {100 * self.error_rate():.0f}%")
+
+
+class UIEventQueue:
+    """Bounded hand-off from worker threads to the Tk main thread.
+
+    Workers post callbacks (blocking while the queue is full); the main thread
+    polls on a timer and runs them in batches. Progress and status updates are
+    latest-wins slots applied at most once per poll, so a fast worker can
+    report every tick without flooding the event loop.
+    """
+
+    POLL_MS = 16  # ~60 Hz, the display refresh rate
+    BATCH = 200
+
+    def __init__(self, root, maxsize=1000):
+        self.root = root
+        self.maxsize = maxsize
+        self.items = []
+        self.cond = Condition()
+        self.progress_value = None
+        self.status_text = None
+        self.apply_progress = None
+        self.apply_status = None
+        self.job = None
+
+    def post(self, callback, *args):
+        with self.cond:
+            # The main thread never waits on itself; only workers get back-pressure
+            if current_thread() is not main_thread():
+                while len(self.items) >= self.maxsize:
+                    self.cond.wait()
+            self.items.append((callback, args))
+
+    def call(self, callback, *args):
+        """Run callback on the main thread and wait for its result (or exception)"""
+        if current_thread() is main_thread():
+            return callback(*args)
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(callback(*args))
+            except BaseException as e:
+                future.set_exception(e)
+        self.post(run)
+        return future.result()
+
+    def progress(self, value=None, text=None):
+        with self.cond:
+            if value is not None:
+                self.progress_value = value
+            if text is not None:
+                self.status_text = text
+
+    def start(self, apply_progress, apply_status):
+        self.apply_progress = apply_progress
+        self.apply_status = apply_status
+        if self.job is None:
+            self.job = self.root.after(self.POLL_MS, self.poll)
+
+    def stop(self):
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+
+    def poll(self):
+        with self.cond:
+            batch = self.items[:self.BATCH]
+            del self.items[:self.BATCH]
+            value, self.progress_value = self.progress_value, None
+            text, self.status_text = self.status_text, None
+            self.cond.notify_all()
+        if value is not None:
+            self.apply_progress(value)
+        if text is not None:
+            self.apply_status(text)
+        for callback, args in batch:
+            try:
+                callback(*args)
+            except Exception:
+                # Same reporting as any other Tk callback error
+                self.root.report_callback_exception(*sys.exc_info())
+        self.job = self.root.after(self.POLL_MS, self.poll)
+
+
+# Chart drawing - plain data in, matplotlib axes out, so the same charts render
+# in the Tk tabs and headlessly (Agg) for reports
+
+def total_chart_data(students, limit=15):
+    """Names and totals of the top students by problems solved"""
+    top = sorted(students, key=lambda x: x.get("problems_solved", 0), reverse=True)[:limit]
+    return [s.get("name", "Unknown") for s in top], [s.get("problems_solved", 0) for s in top]
+
+
+def difficulty_chart_data(students, limit=10):
+    """Names and easy/medium/hard counts of the top students"""
+    top = sorted(students, key=lambda x: x.get("problems_solved", 0), reverse=True)[:limit]
+    return ([s.get("name", "Unknown") for s in top],
+            [s.get("easy_count", 0) for s in top],
+            [s.get("medium_count", 0) for s in top],
+            [s.get("hard_count", 0) for s in top])
+
+
+def progress_chart_data(students):
+    """Number of students in each PROGRESS_RANGES bucket"""
+    counts = [0] * len(PROGRESS_RANGES)
+    for student in students:
+        problems = student.get("problems_solved", 0)
+        for i, (min_val, max_val) in enumerate(PROGRESS_RANGES):
+            if min_val <= problems <= max_val:
+                counts[i] += 1
+                break
+    return (counts,)
+
+
+def _no_data(ax):
+    ax.text(0.5, 0.5, "No data available", ha='center', va='center', fontsize=14)
+    ax.axis('off')
+
+
+def _hide_spines(ax):
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+
+
+def draw_total_chart(ax, names, values, colors):
+    if not names:
+        return _no_data(ax)
+    # Create horizontal bar chart
+    bars = ax.barh(names, values, color=colors['accent'], alpha=0.8)
+    
+    # Add values to end of bars
+    for bar in bars:
+        width = bar.get_width()
+        ax.text(width + 1, bar.get_y() + bar.get_height()/2, 
+               f'{int(width)}', va='center', fontsize=9)
+    
+    # Style the chart
+    ax.set_title('Top Students by Problems Solved', fontsize=14, pad=15)
+    ax.set_xlabel('Number of Problems', fontsize=12)
+    _hide_spines(ax)
+
+
+def draw_difficulty_chart(ax, names, easy, medium, hard, colors):
+    if not names:
+        return _no_data(ax)
+    # Create stacked bar chart
+    width = 0.7
+    ax.bar(names, easy, width, label='Easy', color=colors['easy'])
+    ax.bar(names, medium, width, bottom=easy, label='Medium', color=colors['medium'])
+    
+    # Calculate the bottom position for hard problems
+    bottom_hard = [e + m for e, m in zip(easy, medium)]
+    ax.bar(names, hard, width, bottom=bottom_hard, label='Hard', color=colors['hard'])
+    
+    # Style the chart
+    ax.set_title('Problem Difficulty Breakdown', fontsize=14, pad=15)
+    ax.set_ylabel('Number of Problems', fontsize=12)
+    ax.legend()
+    
+    # Rotate x-labels for better readability
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment('right')
+    _hide_spines(ax)
+
+
+def draw_progress_chart(ax, counts, colors):
+    if not any(counts):
+        return _no_data(ax)
+    # Create bar chart
+    bars = ax.bar(PROGRESS_LABELS, counts, color=colors['accent'], alpha=0.8)
+    
+    # Add counts above bars
+    for bar in bars:
+        height = bar.get_height()
+        if height > 0:
+            ax.text(bar.get_x() + bar.get_width()/2, height + 0.1,
+                  f'{int(height)}', ha='center', va='bottom', fontsize=10)
+    
+    # Style the chart
+    ax.set_title('Class Distribution by Problems Solved', fontsize=14, pad=15)
+    ax.set_xlabel('Number of Problems', fontsize=12)
+    ax.set_ylabel('Number of Students', fontsize=12)
+    _hide_spines(ax)
+
+
+COMPARISON_MODES = ("Auto", "Bars", "Heatmap", "Box", "Violin")
+COMPARISON_BAR_LIMIT = 6  # grouped bars stay readable up to about this many students
+COMPARISON_HEATMAP_LIMIT = 40  # beyond this the heatmap row labels stop being legible
+
+
+def comparison_chart_data(students):
+    """Names and an (n, 3) list of easy/medium/hard counts for the selected students"""
+    return ([s.get("name", "Unknown") for s in students],
+            [[s.get("easy_count", 0), s.get("medium_count", 0), s.get("hard_count", 0)] for s in students])
+
+
+def draw_comparison_chart(ax, names, counts, colors, mode="Auto"):
+    """Compare any number of students; bars for a handful, one vectorized artist for more"""
+    if not names:
+        return _no_data(ax)
+    counts = np.asarray(counts, dtype=float).reshape(-1, 3)
+    n = len(names)
+    if mode == "Auto":
+        if n <= COMPARISON_BAR_LIMIT:
+            mode = "Bars"
+        elif n <= COMPARISON_HEATMAP_LIMIT:
+            mode = "Heatmap"
+        else:
+            mode = "Box"
+    elif mode == "Bars" and n > COMPARISON_HEATMAP_LIMIT:
+        mode = "Box"  # thousands of bar artists would stall the UI
+    categories = ['Easy', 'Medium', 'Hard']
+    x = np.arange(3)
+
+    if mode == "Bars":
+        # One group of bars per difficulty, sized to fit every student
+        width = 0.8 / n
+        for i, (name, row) in enumerate(zip(names, counts)):
+            rects = ax.bar(x - 0.4 + width * (i + 0.5), row, width, label=name)
+            if n <= COMPARISON_BAR_LIMIT:
+                ax.bar_label(rects, fmt='%d', fontsize=9, padding=3)
+        ax.set_xticks(x, categories)
+        ax.set_ylabel('Number of Problems', fontsize=12)
+        if n <= 15:
+            ax.legend(loc='best', fontsize=8 if n > 3 else 10)
+        _hide_spines(ax)
+    elif mode == "Heatmap":
+        image = ax.imshow(counts, aspect='auto', cmap='YlGnBu', interpolation='nearest')
+        ax.figure.colorbar(image, ax=ax, label='Number of Problems')
+        ax.set_xticks(x, categories)
+        if n <= COMPARISON_HEATMAP_LIMIT:
+            ax.set_yticks(np.arange(n), names, fontsize=8 if n > 15 else 10)
+        else:
+            ax.set_ylabel(f'{n} students', fontsize=12)
+    else:
+        if mode == "Violin":
+            parts = ax.violinplot(counts, positions=x, showmedians=True)
+            for body, key in zip(parts['bodies'], ('easy', 'medium', 'hard')):
+                body.set_facecolor(colors[key])
+                body.set_alpha(0.6)
+        else:
+            boxes = ax.boxplot(counts, positions=x, widths=0.5, patch_artist=True, showfliers=False)
+            for box, key in zip(boxes['boxes'], ('easy', 'medium', 'hard')):
+                box.set_facecolor(colors[key])
+                box.set_alpha(0.6)
+        # Every student as one jittered scatter artist over the distributions
+        jitter = np.random.default_rng(0).uniform(-0.12, 0.12, size=counts.shape)
+        ax.scatter((x + jitter).ravel(), counts.ravel(), s=8, color=colors['secondary'], alpha=0.4)
+        ax.set_xticks(x, categories)
+        ax.set_ylabel('Number of Problems', fontsize=12)
+        _hide_spines(ax)
+    ax.set_title(f'Student Comparison by Problem Difficulty ({n} students)', fontsize=14, pad=15)
+
+
+def draw_student_vs_class(ax, name, counts, class_means, colors):
+    """One student's easy/medium/hard counts next to the class averages"""
+    x = np.arange(3)
+    width = 0.38
+    student_bars = ax.bar(x - width / 2, counts, width, label=name,
+                          color=[colors['easy'], colors['medium'], colors['hard']])
+    ax.bar(x + width / 2, class_means, width, label='Class average', color=colors['secondary'], alpha=0.5)
+    ax.bar_label(student_bars, fmt='%d', fontsize=9, padding=3)
+    ax.set_xticks(x, ['Easy', 'Medium', 'Hard'])
+    ax.set_title(f'{name} vs. Class Average', fontsize=14, pad=15)
+    ax.set_ylabel('Number of Problems', fontsize=12)
+    ax.legend(loc='best')
+    _hide_spines(ax)
+
+
+CHART_DRAWERS = {
+    "total": draw_total_chart,
+    "difficulty": draw_difficulty_chart,
+    "progress": draw_progress_chart,
+    "comparison": draw_comparison_chart,
+    "student": draw_student_vs_class,
+}
+
+
+def render_chart_png(job):
+    """Render one (kind, data, colors, path) chart job to PNG with Agg (report worker)"""
+    init_matplotlib()
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    kind, data, colors, path = job
+    fig = Figure(figsize=(8, 5), dpi=100, facecolor=colors['bg'])
+    FigureCanvasAgg(fig)
+    CHART_DRAWERS[kind](fig.add_subplot(111), *data, colors)
+    fig.tight_layout()
+    fig.savefig(path, facecolor=fig.get_facecolor())
+    return path
+
+
+REPORT_INDEX_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{{ title }}</title>
+<style>
+body { font-family: Arial, sans-serif; background: {{ colors.bg }}; color: {{ colors.text }}; margin: 30px; }
+h1 { margin-bottom: 0; } .sub { color: {{ colors.secondary }}; font-style: italic; }
+img { max-width: 100%; } table { border-collapse: collapse; background: white; }
+th, td { padding: 6px 12px; border-bottom: 1px solid #ddd; text-align: left; }
+th { background: {{ colors.accent }}; color: white; }
+</style></head><body>
+<h1>{{ title }}</h1>
+<p class="sub">Generated {{ generated }} &middot; {{ students|length }} students &middot;
+mean {{ "%.1f"|format(summary.mean) }}, median {{ "%.1f"|format(summary.median) }} problems solved</p>
+{% for chart in class_charts %}<img src="{{ chart }}" alt="">{% endfor %}
+<h2>Students</h2>
+<table><tr><th>Rank</th><th>Name</th><th>Roll Number</th><th>LeetCode</th><th>Total</th>
+<th>Easy</th><th>Medium</th><th>Hard</th><th>Profile</th></tr>
+{% for s in students %}<tr><td>{{ s.rank or "-" }}</td><td><a href="{{ s.page }}">{{ s.name }}</a></td>
+<td>{{ s.roll_number }}</td><td>{{ s.leetcode_username }}</td><td>{{ s.problems_solved }}</td>
+<td>{{ s.easy_count }}</td><td>{{ s.medium_count }}</td><td>{{ s.hard_count }}</td>
+<td>{{ "Valid" if s.profile_found else "Not found" }}</td></tr>
+{% endfor %}</table>
+</body></html>
+"""
+
+REPORT_STUDENT_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{{ s.name }}</title>
+<style>
+body { font-family: Arial, sans-serif; background: {{ colors.bg }}; color: {{ colors.text }}; margin: 30px; }
+img { max-width: 100%; } td { padding: 4px 12px; } td:first-child { font-weight: bold; }
+</style></head><body>
+<p><a href="index.html">&larr; Class report</a></p>
+<h1>{{ s.name }}</h1>
+<table>
+<tr><td>LeetCode</td><td>{{ s.leetcode_username or "-" }}</td></tr>
+<tr><td>Roll Number</td><td>{{ s.roll_number or "-" }}</td></tr>
+<tr><td>Section</td><td>{{ s.section or "-" }}</td></tr>
+<tr><td>Rank</td><td>{{ s.rank or "-" }}{% if s.percentile is not none %} ({{ s.percentile }} percentile){% endif %}</td></tr>
+<tr><td>Solved</td><td>{{ s.problems_solved }} (Easy {{ s.easy_count }}, Medium {{ s.medium_count }}, Hard {{ s.hard_count }})</td></tr>
+{% if s.current_streak is defined %}
+<tr><td>Streak</td><td>{{ s.current_streak }} days (max {{ s.max_streak }})</td></tr>
+<tr><td>Active days (7d / 30d)</td><td>{{ s.active_days_7 }} / {{ s.active_days_30 }}</td></tr>
+<tr><td>Acceptance</td><td>{{ s.acceptance_rate }}%</td></tr>
+<tr><td>Contest rating</td><td>{{ s.contest_rating or "-" }}</td></tr>
+<tr><td>Languages</td><td>{{ s.languages or "-" }}</td></tr>
+{% endif %}
+</table>
+<img src="{{ s.chart }}" alt="">
+</body></html>
+"""
+
+
+def generate_report(students, out_dir, colors, leaderboard=None, title="LeetCode Class Report",
+                    progress=None, workers=None):
+    """Write an HTML report (class page + one page per student) with charts rendered in parallel.
+
+    Chart PNGs are named by a hash of their input data, so re-running the report
+    only renders charts whose data changed. Returns the path of index.html.
+    """
+    import jinja2
+
+    chart_dir = os.path.join(out_dir, "charts")
+    os.makedirs(chart_dir, exist_ok=True)
+    chart_colors = {key: colors[key] for key in ('bg', 'accent', 'easy', 'medium', 'hard', 'secondary')}
+
+    def chart_job(kind, data):
+        digest = hashlib.sha1(json.dumps([kind, data, chart_colors], default=str).encode("utf-8")).hexdigest()
+        name = f"{kind}-{digest[:16]}.png"
+        return name, (kind, data, chart_colors, os.path.join(chart_dir, name))
+
+    jobs = []
+    class_charts = []
+    for kind, data in (("total", total_chart_data(students)),
+                       ("difficulty", difficulty_chart_data(students)),
+                       ("progress", progress_chart_data(students))):
+        name, job = chart_job(kind, data)
+        class_charts.append(f"charts/{name}")
+        jobs.append(job)
+
+    totals = np.array([s.get("problems_solved", 0) for s in students], dtype=float)
+    class_means = [round(float(np.mean([s.get(field, 0) for s in students])), 1) if students else 0.0
+                   for field in ("easy_count", "medium_count", "hard_count")]
+
+    rows = []
+    for i, student in enumerate(students):
+        row = student.to_dict()
+        student_id = student["student_id"]
+        row["rank"] = leaderboard.rank(student_id) if leaderboard else None
+        row["percentile"] = leaderboard.percentile(student_id) if leaderboard else None
+        slug = re.sub(r"[^A-Za-z0-9_-]+", "-", row.get("leetcode_username") or row.get("name") or "student")
+        row["page"] = f"student-{i:05d}-{slug}.html"
+        counts = [row.get("easy_count", 0), row.get("medium_count", 0), row.get("hard_count", 0)]
+        name, job = chart_job("student", (row.get("name", "Unknown"), counts, class_means))
+        row["chart"] = f"charts/{name}"
+        jobs.append(job)
+        rows.append(row)
+
+    # Only render charts whose data hash is new
+    pending = [job for job in jobs if not os.path.exists(job[3])]
+    if pending:
+        workers = workers or os.cpu_count() or 1
+        # Spawned, not forked: children import matplotlib, which a forked import lock would deadlock
+        with process_pool(min(workers, len(pending))) as pool:
+            for done, _ in enumerate(pool.map(render_chart_png, pending, chunksize=8), 1):
+                if progress:
+                    progress(done, len(pending))
+
+    env = jinja2.Environment(autoescape=True)
+    student_template = env.from_string(REPORT_STUDENT_TEMPLATE)
+    for row in rows:
+        with open(os.path.join(out_dir, row["page"]), "w", encoding="utf-8") as f:
+            f.write(student_template.render(s=row, colors=colors))
+
+    index_path = os.path.join(out_dir, "index.html")
+    with open(index_path, "w", encoding="utf-8") as f:
+        f.write(env.from_string(REPORT_INDEX_TEMPLATE).render(
+            title=title,
+            generated=datetime.now().strftime("%b %d, %Y %I:%M %p"),
+            students=rows,
+            summary={"mean": float(totals.mean()) if len(totals) else 0.0,
+                     "median": float(np.median(totals)) if len(totals) else 0.0},
+            class_charts=class_charts,
+            colors=colors
+        ))
+    return index_path
+
+
+# Fast chart backend (--charts fast): plain tk.Canvas items instead of matplotlib
+
+FAST_SECTION_COLORS = ['#440154', '#443a83', '#31688e', '#21918c', '#35b779', '#8fd744', '#fde725']  # viridis
+
+
+def nice_step(limit, ticks=4):
+    """Tick spacing of 1, 2 or 5 x 10^n that covers 0..limit in about `ticks` steps"""
+    raw = (limit if limit > 0 else 1) / ticks
+    magnitude = 10 ** np.floor(np.log10(raw))
+    for factor in (1, 2, 5, 10):
+        if raw <= factor * magnitude:
+            return factor * magnitude
+
+
+class CanvasBarChart:
+    """Bar, stacked-bar and histogram charts drawn straight onto a tk.Canvas.
+
+    Items are keyed and kept between draws, so new data only moves
+    rectangles and rewrites text - no figure, layout pass or rasterization.
+    """
+
+    PAD_TOP, PAD_RIGHT, PAD_BOTTOM = 30, 24, 30
+
+    def __init__(self, parent, colors):
+        self.colors = colors
+        self.canvas = tk.Canvas(parent, bg=colors['bg'], highlightthickness=0, width=640, height=360)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.items = {}  # key -> canvas item id
+        self.live = set()
+        self.last = None
+        self.canvas.bind("<Configure>", lambda event: self.last and self.draw(*self.last[0], **self.last[1]))
+
+    def _put(self, key, kind, coords, **options):
+        item = self.items.get(key)
+        if item is None:
+            self.items[key] = getattr(self.canvas, "create_" + kind)(*coords, **options)
+        else:
+            self.canvas.coords(item, *coords)
+            self.canvas.itemconfigure(item, **options)
+        self.live.add(key)
+
+    def _sweep(self):
+        for key in [key for key in self.items if key not in self.live]:
+            self.canvas.delete(self.items.pop(key))
+
+    def draw(self, *args, **kwargs):
+        self.last = (args, kwargs)
+        self.live = set()
+        self._draw(*args, **kwargs)
+        self._sweep()
+
+    def _draw(self, title, labels, series, stacked=False, horizontal=False, value_labels=False,
+              tick_format="{:g}"):
+        """series: [(name, values, color)] with one value per label; a legend is drawn for several"""
+        canvas = self.canvas
+        width = canvas.winfo_width() if canvas.winfo_width() > 1 else int(canvas["width"])
+        height = canvas.winfo_height() if canvas.winfo_height() > 1 else int(canvas["height"])
+        text_color = self.colors['text']
+        self._put("title", "text", (width / 2, 14), text=title, font=('Arial', 12, 'bold'), fill=text_color)
+        if not labels:
+            self._put("empty", "text", (width / 2, height / 2), text="No data available",
+                      font=('Arial', 14), fill=text_color)
+            return
+
+        labels = [str(label) if len(str(label)) <= 18 else str(label)[:17] + "…" for label in labels]
+        values = np.array([values for _, values, _ in series], dtype=float).reshape(len(series), len(labels))
+        peak = round(float((values.sum(axis=0) if stacked else values.max(axis=0)).max()), 9)
+        step = nice_step(peak)
+        limit = step * max(1, np.ceil(peak / step))
+
+        # Plot area: room for category labels on the left (horizontal) or below (vertical)
+        top = self.PAD_TOP + (18 if len(series) > 1 else 0)
+        longest = max(len(label) for label in labels)
+        left = min(150, 14 + 6 * longest) if horizontal else 44
+        rotate = not horizontal and longest * 6 > (width - left - self.PAD_RIGHT) / len(labels)
+        bottom = height - self.PAD_BOTTOM - (4 * longest if rotate else 0)
+        right = width - self.PAD_RIGHT
+        span = (right - left) if horizontal else (bottom - top)
+        scale = span / limit
+        band = ((bottom - top) if horizontal else (right - left)) / len(labels)
+
+        # Grid lines and value-axis ticks
+        for k in range(int(round(limit / step)) + 1):
+            offset = k * step * scale
+            tick = tick_format.format(k * step)
+            if horizontal:
+                self._put(("grid", k), "line", (left + offset, top, left + offset, bottom), fill="#dddddd")
+                self._put(("tick", k), "text", (left + offset, bottom + 4), text=tick, anchor="n",
+                          font=('Arial', 8), fill=text_color)
+            else:
+                self._put(("grid", k), "line", (left, bottom - offset, right, bottom - offset), fill="#dddddd")
+                self._put(("tick", k), "text", (left - 4, bottom - offset), text=tick, anchor="e",
+                          font=('Arial', 8), fill=text_color)
+
+        thickness = band * (0.7 if stacked or len(series) == 1 else 0.8 / len(series))
+        base = np.zeros(len(labels))
+        for j, (name, _, color) in enumerate(series):
+            for i, value in enumerate(values[j]):
+                start = band * i + (band - (thickness if stacked else thickness * len(series))) / 2
+                start += 0 if stacked else j * thickness
+                low, high = base[i] * scale, (base[i] + value) * scale
+                if horizontal:
+                    coords = (left + low, top + start, left + high, top + start + thickness)
+                else:
+                    coords = (left + start, bottom - high, left + start + thickness, bottom - low)
+                self._put(("bar", j, i), "rectangle", coords, fill=color, outline="")
+                if value_labels:
+                    text = f"{value:.0f}"
+                    if horizontal:
+                        self._put(("value", j, i), "text", (coords[2] + 4, (coords[1] + coords[3]) / 2),
+                                  text=text, anchor="w", font=('Arial', 8), fill=text_color)
+                    elif value > 0:
+                        self._put(("value", j, i), "text", ((coords[0] + coords[2]) / 2, coords[1] - 2),
+                                  text=text, anchor="s", font=('Arial', 8), fill=text_color)
+            if stacked:
+                base = base + values[j]
+
+        # Category labels
+        for i, label in enumerate(labels):
+            center = band * (i + 0.5)
+            if horizontal:
+                self._put(("label", i), "text", (left - 6, top + center), text=label, anchor="e",
+                          font=('Arial', 9), fill=text_color)
+            else:
+                self._put(("label", i), "text", (left + center, bottom + 4), text=label,
+                          anchor="ne" if rotate else "n", angle=30 if rotate else 0,
+                          font=('Arial', 9), fill=text_color)
+
+        self._put("axis", "line", (left, top, left, bottom) if horizontal else (left, bottom, right, bottom),
+                  fill=text_color)
+
+        if len(series) > 1:
+            x = left
+            for j, (name, _, color) in enumerate(series):
+                self._put(("legend-box", j), "rectangle", (x, top - 16, x + 10, top - 6), fill=color, outline="")
+                self._put(("legend", j), "text", (x + 14, top - 11), text=name, anchor="w",
+                          font=('Arial', 8), fill=text_color)
+                x += 24 + 6 * len(name)
+
+
+_matplotlib_ready = False
+
+
+def init_matplotlib():
+    """Import and style matplotlib on first use, so fast-chart runs never load it"""
+    global _matplotlib_ready
+    import matplotlib
+    if not _matplotlib_ready:
+        import matplotlib.style
+        matplotlib.rcParams['font.family'] = 'Arial'
+        matplotlib.style.use('ggplot')
+        _matplotlib_ready = True
+    return matplotlib
+
+
 class LeetCodeDashboard:
-    def __init__(self, root):
+    def __init__(self, root, shared_cache=None, transport=None, api_url=LEETCODE_API_URL,
+                 chart_backend="matplotlib", roster_cache_dir=None):
         self.root = root
+        self.chart_backend = chart_backend  # "matplotlib", or "fast" for tk.Canvas charts
+        self.fast_charts = {}  # chart tab -> [CanvasBarChart]
+        self.shared_cache = shared_cache
+        self.roster_cache_dir = roster_cache_dir  # parsed-workbook cache; None disables it
+        self.api_url = api_url
+        # One pooled client for all fetches; the transport can record or replay traffic
+        self.http = httpx.Client(transport=transport, timeout=10.0)
         self.root.title("LeetCode Student Performance Dashboard")
         self.student_data = []
         self.displayed_data = []
+        self.view_version = 0  # bumped when displayed_data changes
+        self.data_version = 0  # bumped when student records change
+        self.sections_version = 0  # bumped on full updates only - section stats scan every roster
+        self.view_status = None
+        self.row_cache = {}  # iid -> values last written to the Treeview
+        self.leaderboard = Leaderboard()
+        self.aggregates = ViewAggregates()  # chart inputs for displayed_data
+        self.live_chart_job = None
+        self.workspace = Workspace()
+        self.filter_engine = FilterEngine(self.workspace.store)
+        self.active_section = None  # None = all sections
+        self.refresher = RefreshScheduler(self)
+        self.concurrency = AdaptiveConcurrency()  # learned limit carries over between uploads
+        self.watcher = RosterWatcher(self)
         self.selected_students = []
         self.last_update_time = None
         
@@ -82,11 +2649,26 @@ class LeetCodeDashboard:
         self.create_widgets()
         self.root.bind('<Control-s>', lambda event: self.export_data())
         
+        # Coalesced rendering of the table, details panel and charts
+        self.renderer = RenderScheduler(self.root, {
+            "table": (lambda: (self.view_version, self.data_version), self.render_table),
+            "details": (lambda: (self.view_version, self.data_version), self.on_student_select),
+            "charts": (lambda: (self.view_version, self.data_version), self.update_charts),
+            "sections": (lambda: self.sections_version, self.update_section_chart),
+        })
+        self.renderer.after_render = self.on_render_done
+        
+        # Worker threads talk to Tk only through this queue
+        self.ui_events = UIEventQueue(self.root)
+        self.ui_events.start(lambda value: self.progress.config(value=value),
+                             lambda text: self.status.config(text=text))
+        
         # Set charts
         self.total_chart = None
         self.difficulty_chart = None
         self.comparison_chart = None
         self.progress_chart = None
+        self.section_chart = None
 
     def _on_frame_configure(self, event=None):
         """Update scroll region when inner frame size changes"""
@@ -203,28 +2785,55 @@ class LeetCodeDashboard:
         self.setup_about_tab()
 
     def show_invalid_profiles(self):
-        """Display only students with invalid LeetCode profiles"""
+        """Display only students whose LeetCode profile was not found (fetch errors excluded)"""
         if not self.student_data:
             messagebox.showinfo("No Data", "Please upload student data first.")
             return
 
-        # Filter the data to show only students with invalid profiles
-        invalid_profiles = [
-            student for student in self.student_data
-            if student.get("leetcode_username") and not student.get("profile_found", False)
-        ]
-
+        invalid_profiles = self.workspace.invalid_students(self.active_section)
         if not invalid_profiles:
             messagebox.showinfo("No Invalid Profiles", "All students with LeetCode usernames have valid profiles.")
             return
 
-        # Update displayed data and refresh
-        self.displayed_data = invalid_profiles
-        self.update_display()
+        self.search_var.set("")
+        status = f"Showing {len(invalid_profiles)} students with invalid LeetCode profiles"
+        errors = len(self.workspace.store.error_usernames())
+        if errors:
+            status += f" ({errors} more could not be checked)"
+        self.set_view(invalid_profiles, status=status)
+
+    def revalidate_invalid(self):
+        """Re-check only the not-found usernames, bypassing the negative cache"""
+        usernames = {
+            key: students[0]["leetcode_username"]
+            for key in self.workspace.store.invalid_usernames()
+            for students in [self.workspace.students_with_username(key)] if students
+        }
+        if not usernames:
+            messagebox.showinfo("No Invalid Profiles", "There are no invalid profiles to re-validate.")
+            return
 
-        # Update status
-        self.status.config(text=f"Showing {len(invalid_profiles)} students with invalid LeetCode profiles")
+        self.status.config(text=f"Re-validating {len(usernames)} invalid profiles...")
+        self.progress['value'] = 0
+        Thread(target=self.process_revalidation, args=(usernames, self.extended_var.get()), daemon=True).start()
 
+    def process_revalidation(self, usernames, extended=False):
+        limiter = self.concurrency
+        fixed = 0
+        with ThreadPoolExecutor(max_workers=limiter.max_limit) as executor:
+            futures = {
+                executor.submit(limiter.call, self.fetch_leetcode_data, username, extended, True): key
+                for key, username in usernames.items()
+            }
+            for i, future in enumerate(as_completed(futures)):
+                result = future.result()
+                # Rows, ranks and running aggregates are patched per result on the main thread
+                self.ui_events.post(self.on_refresh_result, futures[future], result)
+                fixed += bool(result["found"])
+                self.ui_events.progress(100 * (i + 1) / len(futures),
+                                        f"Re-validating {i+1}/{len(futures)} - {limiter.describe()}")
+        self.ui_events.post(self.on_refresh_cycle_done)
+        self.ui_events.progress(text=f"Re-validated {len(usernames)} profiles: {fixed} now valid")
 
     def export_invalid_profiles(self):
         """Export a list of students with invalid LeetCode profiles to a CSV file"""
@@ -232,11 +2841,7 @@ class LeetCodeDashboard:
             messagebox.showinfo("No Data", "Please upload student data first.")
             return
 
-        # Filter for invalid profiles
-        invalid_profiles = [
-            student for student in self.student_data
-            if student.get("leetcode_username") and not student.get("profile_found", False)
-        ]
+        invalid_profiles = self.workspace.invalid_students(self.active_section)
 
         if not invalid_profiles:
             messagebox.showinfo("No Invalid Profiles", "All students with LeetCode usernames have valid profiles.")
@@ -254,7 +2859,7 @@ class LeetCodeDashboard:
 
         try:
             # Convert to DataFrame and save
-            df = pd.DataFrame(invalid_profiles)
+            df = pd.DataFrame([student.to_dict() for student in invalid_profiles])
             # Select relevant columns
             columns_to_export = ['name', 'roll_number', 'leetcode_username', 'email', 'phone']
             export_columns = [col for col in columns_to_export if col in df.columns]
@@ -281,20 +2886,27 @@ class LeetCodeDashboard:
             return  # User canceled
 
         try:
-            df = pd.DataFrame(self.displayed_data)
+            df = pd.DataFrame([student.to_dict() for student in self.displayed_data])
+            df['rank'] = [self.leaderboard.rank(s["student_id"]) for s in self.displayed_data]
+            df['percentile'] = [self.leaderboard.percentile(s["student_id"]) for s in self.displayed_data]
 
             # Select and order relevant columns
             columns = [
-                'name', 'roll_number', 'leetcode_username', 
+                'rank', 'percentile', 'name', 'roll_number', 'leetcode_username', 
                 'problems_solved', 'easy_count', 'medium_count', 'hard_count',
                 'email', 'phone', 'profile_found'
             ]
 
+            # Include precomputed extended metrics when they were fetched
+            columns += [col for col in EXTENDED_DEFAULTS if col in df.columns]
+
             # Create new DataFrame with selected columns
             export_df = df[columns]
 
             # Rename columns for better readability
             export_df = export_df.rename(columns={
+                'rank': 'Rank',
+                'percentile': 'Percentile',
                 'leetcode_username': 'LeetCode Username',
                 'problems_solved': 'Total Solved',
                 'easy_count': 'Easy',
@@ -314,6 +2926,56 @@ class LeetCodeDashboard:
         except Exception as e:
             messagebox.showerror("Export Failed", f"Error exporting data: {str(e)}")
 
+    def save_snapshot_file(self):
+        """Save every loaded section, with fetched stats, to a snapshot for instant reopening"""
+        students = self.workspace.students()
+        if not students:
+            messagebox.showinfo("No Data", "Please upload student data first.")
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=SNAPSHOT_EXTENSION,
+            filetypes=[("Dashboard Snapshots", "*" + SNAPSHOT_EXTENSION)],
+            title="Save Snapshot"
+        )
+
+        if not file_path:
+            return  # User canceled
+
+        try:
+            save_snapshot(file_path, students, self.workspace.store, self.last_update_time)
+            messagebox.showinfo("Snapshot Saved", 
+                               f"Saved {len(students)} students to {file_path}")
+        except Exception as e:
+            messagebox.showerror("Snapshot Failed", f"Failed to save snapshot: {str(e)}")
+
+    def generate_report(self):
+        """Write a static HTML report of the current view, with per-student pages"""
+        students = list(self.displayed_data)
+        if not students:
+            messagebox.showinfo("No Data", "Please upload student data first.")
+            return
+
+        out_dir = filedialog.askdirectory(title="Choose Report Folder")
+        if not out_dir:
+            return  # User canceled
+
+        def report_progress(done, total):
+            self.ui_events.progress(100 * done / total, f"Rendering report charts {done}/{total}...")
+
+        def run():
+            try:
+                index_path = generate_report(students, out_dir, self.colors, self.leaderboard,
+                                             progress=report_progress)
+            except Exception as e:
+                self.ui_events.post(self.show_error, f"Failed to generate report: {str(e)}")
+                return
+            self.ui_events.progress(text=f"Report written to {index_path}")
+            self.ui_events.post(webbrowser.open, "file://" + os.path.abspath(index_path))
+
+        self.status.config(text=f"Generating report for {len(students)} students...")
+        Thread(target=run, daemon=True).start()
+
     def setup_dashboard_tab(self):
         # Main container with padding
         container = ttk.Frame(self.dashboard_tab, padding=(20, 15))
@@ -328,6 +2990,19 @@ class LeetCodeDashboard:
         self.update_label = ttk.Label(title_frame, text="", style='TLabel')
         self.update_label.pack(side=tk.RIGHT)
         
+        # Auto-refresh controls
+        self.auto_refresh_var = tk.BooleanVar(value=False)
+        self.refresh_interval_var = tk.IntVar(value=30)
+        ttk.Label(title_frame, text="min").pack(side=tk.RIGHT, padx=(2, 15))
+        interval_box = ttk.Spinbox(title_frame, from_=1, to=1440, width=5, textvariable=self.refresh_interval_var,
+                                   command=self.toggle_auto_refresh)
+        interval_box.pack(side=tk.RIGHT)
+        # The arrows fire command; a typed value applies on Enter or when focus leaves
+        interval_box.bind('<Return>', self.on_refresh_interval_typed)
+        interval_box.bind('<FocusOut>', self.on_refresh_interval_typed)
+        ttk.Checkbutton(title_frame, text="Auto-refresh every", variable=self.auto_refresh_var,
+                        command=self.toggle_auto_refresh).pack(side=tk.RIGHT, padx=5)
+        
         # Top controls frame
         top_frame = ttk.Frame(container)
         top_frame.pack(fill=tk.X, pady=(0, 15))
@@ -342,12 +3017,32 @@ class LeetCodeDashboard:
         # In the upload_frame section, after the upload button
         ttk.Button(upload_frame, text="Download Data", 
           command=self.export_data, style='Secondary.TButton').pack(side=tk.LEFT, padx=5)
+        ttk.Button(upload_frame, text="Save Snapshot", 
+          command=self.save_snapshot_file, style='Secondary.TButton').pack(side=tk.LEFT, padx=5)
+        ttk.Button(upload_frame, text="Generate Report", 
+          command=self.generate_report, style='Secondary.TButton').pack(side=tk.LEFT, padx=5)
+        self.watch_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(upload_frame, text="Watch Files", variable=self.watch_var,
+                        command=self.toggle_watch).pack(side=tk.LEFT, padx=5)
+        ttk.Button(upload_frame, text="Add Section", 
+          command=lambda: self.upload_file(add_section=True), style='Secondary.TButton').pack(side=tk.LEFT, padx=5)
+        self.section_var = tk.StringVar(value="All Sections")
+        self.section_combo = ttk.Combobox(upload_frame, textvariable=self.section_var, 
+          values=["All Sections"], state="readonly", width=16)
+        self.section_combo.pack(side=tk.LEFT, padx=5)
+        self.section_combo.bind("<<ComboboxSelected>>", self.on_section_select)
+        # Extended stats (contest, streaks, languages) use a heavier query - opt in
+        self.extended_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(upload_frame, text="Extended Stats", 
+          variable=self.extended_var).pack(side=tk.LEFT, padx=5)
         # Search Section
         search_frame = ttk.LabelFrame(top_frame, text="Search Students", padding=(10, 5))
         search_frame.pack(side=tk.RIGHT, fill=tk.X, expand=True)
         
         self.search_var = tk.StringVar()
-        ttk.Entry(search_frame, textvariable=self.search_var, width=25).pack(side=tk.LEFT, padx=5)
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=25)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind("<Return>", lambda event: self.search_data())
         ttk.Button(search_frame, text="Search", command=self.search_data).pack(side=tk.LEFT, padx=5)
         ttk.Button(search_frame, text="Clear", command=self.clear_search, style='Secondary.TButton').pack(side=tk.LEFT, padx=5)
         # Add this to the upload_frame in setup_dashboard_tab where the other buttons are
@@ -355,6 +3050,8 @@ class LeetCodeDashboard:
           command=self.show_invalid_profiles, style='Secondary.TButton').pack(side=tk.LEFT, padx=5)
         ttk.Button(upload_frame, text="Export Invalid Profiles", 
           command=self.export_invalid_profiles, style='Secondary.TButton').pack(side=tk.LEFT, padx=5)
+        ttk.Button(upload_frame, text="Re-validate Invalid", 
+          command=self.revalidate_invalid, style='Secondary.TButton').pack(side=tk.LEFT, padx=5)
         # Add filter dropdown in search_frame
         filter_btn = ttk.Button(search_frame, text="Filters ▼", command=self.show_filter_menu)
         filter_btn.pack(side=tk.RIGHT, padx=5)
@@ -404,6 +3101,33 @@ class LeetCodeDashboard:
                   command=self.compare_selected).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Clear Selection", 
                   command=self.clear_selection, style='Secondary.TButton').pack(side=tk.LEFT, padx=5)
+        self.comparison_mode_var = tk.StringVar(value="Auto")
+        mode_combo = ttk.Combobox(btn_frame, textvariable=self.comparison_mode_var, state="readonly",
+                                  width=9, values=COMPARISON_MODES)
+        mode_combo.pack(side=tk.LEFT, padx=5)
+        mode_combo.bind("<<ComboboxSelected>>",
+                        lambda e: self.selected_students and self.update_comparison_chart(self.selected_students))
+        
+        # Ranking settings
+        ranking_frame = ttk.LabelFrame(bottom_left, text="Ranking", padding=(10, 5))
+        ranking_frame.pack(fill=tk.X, pady=(10, 0))
+        
+        self.rank_metric_var = tk.StringVar(value="Total Solved")
+        ttk.Combobox(ranking_frame, textvariable=self.rank_metric_var, state="readonly", width=14,
+                     values=["Total Solved", "Weighted Score"]).pack(side=tk.LEFT, padx=5)
+        self.rank_type_var = tk.StringVar(value="Competition")
+        ttk.Combobox(ranking_frame, textvariable=self.rank_type_var, state="readonly", width=12,
+                     values=["Competition", "Dense"]).pack(side=tk.LEFT, padx=5)
+        self.rank_weight_vars = []
+        for label, weight in (("E", 1), ("M", 2), ("H", 3)):
+            ttk.Label(ranking_frame, text=f"{label}:").pack(side=tk.LEFT, padx=(5, 0))
+            var = tk.IntVar(value=weight)
+            ttk.Spinbox(ranking_frame, from_=0, to=20, width=3, textvariable=var,
+                        command=self.configure_ranking).pack(side=tk.LEFT)
+            self.rank_weight_vars.append(var)
+        for child in ranking_frame.winfo_children():
+            if isinstance(child, ttk.Combobox):
+                child.bind("<<ComboboxSelected>>", lambda event: self.configure_ranking())
         
         # Right side - charts
         right_frame = ttk.Frame(content_frame)
@@ -418,11 +3142,13 @@ class LeetCodeDashboard:
         self.difficulty_tab = ttk.Frame(self.chart_notebook)
         self.comparison_tab = ttk.Frame(self.chart_notebook)
         self.progress_tab = ttk.Frame(self.chart_notebook)
+        self.section_tab = ttk.Frame(self.chart_notebook)
         
         self.chart_notebook.add(self.total_tab, text="Total Problems")
         self.chart_notebook.add(self.difficulty_tab, text="Difficulty Breakdown")
         self.chart_notebook.add(self.comparison_tab, text="Student Comparison")
         self.chart_notebook.add(self.progress_tab, text="Class Distribution")
+        self.chart_notebook.add(self.section_tab, text="Sections")
         
         # Status Bar with progress
         status_frame = ttk.Frame(container)
@@ -512,7 +3238,8 @@ class LeetCodeDashboard:
 
     def sort_treeview(self, column):
         """Sort treeview content when a column header is clicked"""
-        column_index = {"Name": "name", 
+        column_index = {"Rank": "rank",
+                        "Name": "name", 
                         "LeetCode Username": "leetcode_username", 
                         "Total Solved": "problems_solved", 
                         "Easy": "easy_count", 
@@ -530,12 +3257,22 @@ class LeetCodeDashboard:
         self.sort_column = column
 
         # Sort the displayed data
-        self.displayed_data = sorted(
-            self.displayed_data,
-            key=lambda x: (x.get(column_index[column], "") is None, 
-                          x.get(column_index[column], "")),
-            reverse=(self.sort_direction == 'desc')
-        )
+        if column == "Rank":
+            # Unranked students always go last
+            sorted_data = sorted(
+                self.displayed_data,
+                key=lambda x: (self.leaderboard.rank(x["student_id"]) or float('inf'))
+            )
+            if self.sort_direction == 'desc':
+                ranked = [x for x in sorted_data if self.leaderboard.rank(x["student_id"])]
+                sorted_data = ranked[::-1] + sorted_data[len(ranked):]
+        else:
+            sorted_data = sorted(
+                self.displayed_data,
+                key=lambda x: (x.get(column_index[column], "") is None, 
+                              x.get(column_index[column], "")),
+                reverse=(self.sort_direction == 'desc')
+            )
 
         # Update arrow in column header
         for col in self.tree["columns"]:
@@ -548,7 +3285,7 @@ class LeetCodeDashboard:
                               (" ▲" if self.sort_direction == 'asc' else " ▼"))
 
         # Update display
-        self.update_display()   
+        self.set_view(sorted_data)
     def _handle_treeview_scroll(self, event):
         """Handle Treeview-specific scrolling"""
         self.tree.yview_scroll(int(-1 * (event.delta / 120)), "units")
@@ -559,7 +3296,7 @@ class LeetCodeDashboard:
         table_frame.pack(fill=tk.BOTH, expand=True)
 
         # Define columns
-        columns = ("Name", "LeetCode Username", "Total Solved", "Easy", "Medium", "Hard", "Profile")
+        columns = ("Rank", "Name", "LeetCode Username", "Total Solved", "Easy", "Medium", "Hard", "Profile")
 
         # Create treeview
         self.tree = ttk.Treeview(table_frame, columns=columns, show="headings", selectmode="extended")
@@ -580,6 +3317,7 @@ class LeetCodeDashboard:
                              command=lambda c=col: self.sort_treeview(c))
 
         # Set column widths
+        self.tree.column("Rank", width=50, anchor=tk.CENTER)
         self.tree.column("Name", width=150, anchor=tk.W)
         self.tree.column("LeetCode Username", width=120, anchor=tk.W)
         self.tree.column("Total Solved", width=90, anchor=tk.CENTER)
@@ -645,6 +3383,13 @@ class LeetCodeDashboard:
         self.stats_var = tk.StringVar()
         ttk.Label(stats_frame, textvariable=self.stats_var, style="Info.TLabel").pack(side=tk.LEFT, fill=tk.X, expand=True)
         
+        # Activity (precomputed at fetch time in extended mode)
+        activity_frame = ttk.Frame(fields_frame)
+        activity_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(activity_frame, text="Activity:", width=15, anchor=tk.W).pack(side=tk.LEFT)
+        self.activity_var = tk.StringVar()
+        ttk.Label(activity_frame, textvariable=self.activity_var, style="Info.TLabel").pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
         # Initialize with empty values
         self.clear_student_details()
 
@@ -655,6 +3400,7 @@ class LeetCodeDashboard:
         self.email_var.set("-")
         self.phone_var.set("-")
         self.stats_var.set("-")
+        self.activity_var.set("-")
 
     def update_student_details(self, student):
         if student:
@@ -668,160 +3414,423 @@ class LeetCodeDashboard:
             if student.get("profile_found", False):
                 stats = f"Total: {student.get('problems_solved', 0)} | Easy: {student.get('easy_count', 0)} | "
                 stats += f"Medium: {student.get('medium_count', 0)} | Hard: {student.get('hard_count', 0)}"
+                rank = self.leaderboard.rank(student["student_id"])
+                if rank:
+                    stats += f" | Rank: {rank}/{len(self.leaderboard)}"
+                    stats += f" ({self.leaderboard.percentile(student['student_id'])} pct)"
                 self.stats_var.set(stats)
+                self.activity_var.set(self.format_activity(student))
             else:
                 self.stats_var.set("Profile not found")
+                self.activity_var.set("-")
         else:
             self.clear_student_details()
 
-    def upload_file(self):
-        file_path = filedialog.askopenfilename(
-            filetypes=[("CSV/Excel Files", "*.csv *.xls *.xlsx")],
-            title="Select Student Data File"
+    def format_activity(self, student):
+        """Format the precomputed extended metrics for the details panel"""
+        if "current_streak" not in student:
+            return "Not fetched (enable Extended Stats)"
+        activity = f"Streak: {student['current_streak']}d (max {student['max_streak']}d) | "
+        activity += f"Active 7d/30d: {student['active_days_7']}/{student['active_days_30']} | "
+        activity += f"Acceptance: {student['acceptance_rate']}%"
+        if student.get("contest_rating"):
+            activity += f" | Rating: {student['contest_rating']}"
+        if student.get("top_language"):
+            activity += f" | {student['top_language']}"
+        return activity
+
+    def upload_file(self, add_section=False):
+        file_paths = filedialog.askopenfilenames(
+            filetypes=[("CSV/Excel Files", "*.csv *.xls *.xlsx"),
+                       ("Dashboard Snapshots", "*" + SNAPSHOT_EXTENSION)],
+            title="Select Student Data File(s)"
         )
-        if file_path:
+        if file_paths:
             self.status.config(text="Processing file...")
-            self.file_label.config(text=os.path.basename(file_path))
+            names = [os.path.basename(path) for path in file_paths]
+            self.file_label.config(text=names[0] if len(names) == 1 else f"{len(names)} files")
             self.progress['value'] = 0
-            Thread(target=self.process_file, args=(file_path,), daemon=True).start()
+            # Tk variables are read here; the worker only gets plain values
+            Thread(target=self.process_files, args=(list(file_paths), add_section, self.extended_var.get()),
+                   daemon=True).start()
 
-    def process_file(self, file_path):
+    def process_files(self, file_paths, add_section=False, extended=False):
+        """Worker: parse and fetch; the workspace itself only changes on the main thread"""
         try:
-            self.root.after(0, lambda: self.progress.config(value=10))
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path)
+            self.ui_events.progress(10)
+            snapshot_paths = [path for path in file_paths if path.endswith(SNAPSHOT_EXTENSION)]
+            roster_paths = [path for path in file_paths if not path.endswith(SNAPSHOT_EXTENSION)]
+            chunks = parse_roster_files(roster_paths, self.roster_cache_dir) if roster_paths else []
             
-            self.root.after(0, lambda: self.progress.config(value=20))
+            self.ui_events.progress(20)
             
-            required_columns = ["name", "leetcode_username"]
-            optional_columns = ["roll_number", "email", "phone"]
-            
-            if not all(col in df.columns for col in required_columns):
-                self.root.after(0, self.show_error, "Missing required columns: name or leetcode_username")
+            errors = [f"{os.path.basename(c['path'])}: {c['error']}" for c in chunks if "error" in c]
+            chunks = [c for c in chunks if "error" not in c]
+            if errors:
+                self.ui_events.post(self.show_error, "\n".join(errors))
+            if chunks:
+                timings = ", ".join(
+                    f"{os.path.basename(c['path'])} {1000 * c['parse_seconds']:.0f} ms ({c['engine']})" for c in chunks
+                )
+                self.ui_events.post(lambda: self.file_label.config(text=f"Parsed {timings}"))
+            if not chunks and not snapshot_paths:
                 return
 
-            # Convert DataFrame to dictionary records
-            self.student_data = df.to_dict('records')
-            
-            # Add missing columns as empty values
-            for student in self.student_data:
-                for col in optional_columns:
-                    if col not in student:
-                        student[col] = ""
+            # Snapshots come back already enriched - no parsing, no fetching
+            snapshots = []
+            snapshot_time = None
+            for path in snapshot_paths:
+                sections, fetched, saved_at = load_snapshot(path)
+                snapshots.append((sections, fetched))
+                snapshot_time = max(filter(None, (snapshot_time, saved_at)), default=None)
             
-            total_students = len(self.student_data)
-            valid_students = sum(1 for s in self.student_data if s.get("leetcode_username"))
+            # Merge the columnar chunks into compact records, one section per file
+            rosters = [(chunk["section"], chunk["path"], records_from_chunk(chunk)) for chunk in chunks]
             
-            self.root.after(0, lambda: self.status.config(text=f"Fetching LeetCode data for {valid_students} students..."))
+            # Fetch each unique username once, across every loaded section
+            pending = self.ui_events.call(self.load_rosters, snapshots, rosters, add_section, extended)
             
-            with ThreadPoolExecutor(max_workers=5) as executor:
-                futures = []
-                student_indices = []
+            # The pool is sized for the ceiling; the controller decides how many run at once
+            limiter = self.concurrency
+            with ThreadPoolExecutor(max_workers=limiter.max_limit) as executor:
+                futures = {
+                    executor.submit(limiter.call, self.fetch_leetcode_data, username, extended): key
+                    for key, username in pending.items()
+                }
                 
-                for i, student in enumerate(self.student_data):
-                    if student.get("leetcode_username"):
-                        futures.append(executor.submit(
-                            self.fetch_leetcode_data,
-                            student["leetcode_username"]
-                        ))
-                        student_indices.append(i)
-                
-                for i, future in enumerate(futures):
-                    # Update progress
-                    progress_value = 20 + int(70 * (i+1) / len(futures))
-                    self.root.after(0, lambda val=progress_value: self.progress.config(value=val))
-                    
-                    result = future.result()
-                    idx = student_indices[i]
-                    username = self.student_data[idx]["leetcode_username"]
+                for i, future in enumerate(as_completed(futures)):
+                    # Update progress (coalesced - applied at most once per UI poll)
+                    self.ui_events.progress(
+                        20 + int(70 * (i+1) / len(futures)),
+                        f"Fetching {i+1}/{len(futures)} - {limiter.describe()}"
+                    )
                     
-                    if result["found"]:
-                        self.student_data[idx].update({
-                            "problems_solved": result["total_solved"],
-                            "easy_count": result["easy"],
-                            "medium_count": result["medium"],
-                            "hard_count": result["hard"],
-                            "profile_found": True
-                        })
-                    else:
-                        self.student_data[idx].update({
-                            "problems_solved": 0,
-                            "easy_count": 0,
-                            "medium_count": 0,
-                            "hard_count": 0,
-                            "profile_found": False
-                        })
-
-            # Record update time
-            self.last_update_time = datetime.now()
-            self.displayed_data = self.student_data.copy()
-            self.root.after(0, lambda: self.progress.config(value=100))
-            self.root.after(0, self.update_display)
+                    self.ui_events.post(self.on_refresh_result, futures[future], future.result())
+
+            # Record update time (a snapshot-only load keeps the snapshot's time)
+            self.ui_events.progress(100)
+            self.ui_events.post(self.on_files_loaded,
+                                datetime.now() if chunks or not snapshot_time else snapshot_time)
             
         except Exception as e:
-            self.root.after(0, self.show_error, f"Error processing file: {str(e)}")
-            self.root.after(0, lambda: self.progress.config(value=0))
+            self.ui_events.post(self.show_error, f"Error processing file: {str(e)}")
+            self.ui_events.progress(0)
+
+    def load_rosters(self, snapshots, rosters, add_section, extended):
+        """Main thread: add parsed rosters to the workspace; returns the usernames still to fetch"""
+        # A plain upload starts a fresh workspace; "Add Section" keeps the others loaded
+        if not add_section:
+            self.workspace.clear()
+            # Re-uploading is how users refresh stats; only the negative cache survives it
+            self.workspace.store.forget_found()
+            self.watcher.clear()
+            self.active_section = None
+        
+        for sections, fetched in snapshots:
+            self.workspace.store.seed(fetched)
+            for section, records in sections.items():
+                self.workspace.add_roster(self.workspace.unique_section(section), records)
+        
+        students = []
+        for section, path, records in rosters:
+            # Sections are named after the file stem; a/roster.xlsx and b/roster.xlsx must not
+            # replace each other - only re-adding the same file reloads its section
+            watched = self.watcher.files.get(section)
+            if not (watched and os.path.abspath(watched[0]) == os.path.abspath(path)):
+                section = self.workspace.unique_section(section)
+            self.workspace.add_roster(section, records)
+            self.watcher.watch(section, path)
+            students.extend(records)
+        
+        pending = self.workspace.pending_usernames(students, extended)
+        for student in students:
+            result = self.workspace.store.get(student.get("leetcode_username"))
+            if result is not None:
+                self.apply_fetch_result(student, result)
+        
+        self.student_data = self.workspace.students(self.active_section)
+        if pending:
+            # Show the roster now; results stream into its rows and charts as they land
+            self.update_display(f"Fetching LeetCode data for {len(pending)} students...")
+        return pending
+
+    def on_files_loaded(self, update_time):
+        self.last_update_time = update_time
+        self.refresh_section_list()
+        self.update_display()
+
+    def refresh_section_list(self):
+        """Sync the section selector with the rosters in the workspace"""
+        self.section_combo.config(values=["All Sections"] + self.workspace.sections())
+        self.section_var.set(self.active_section or "All Sections")
 
-    def fetch_leetcode_data(self, username):
+    def on_section_select(self, event=None):
+        section = self.section_var.get()
+        self.active_section = None if section == "All Sections" else section
+        self.student_data = self.workspace.students(self.active_section)
+        self.leaderboard.rebuild(self.student_data)
+        self.set_view(self.student_data.copy())
+
+    def configure_ranking(self):
+        """Apply the ranking settings (metric, rank type, weights) and re-rank everyone"""
         try:
-            response = httpx.post(
-                LEETCODE_API_URL,
-                json={"query": USER_PROFILE_QUERY, "variables": {"username": username}},
-                timeout=10.0
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("data", {}).get("matchedUser"):
-                    submissions = data["data"]["matchedUser"]["submitStats"]["acSubmissionNum"]
-                    easy = next((i["count"] for i in submissions if i["difficulty"] == "Easy"), 0)
-                    medium = next((i["count"] for i in submissions if i["difficulty"] == "Medium"), 0)
-                    hard = next((i["count"] for i in submissions if i["difficulty"] == "Hard"), 0)
-                    # Calculate total correctly by adding the individual difficulty counts
-                    total = easy + medium + hard
-                    
-                    return {
-                        "found": True,
-                        "total_solved": total,
-                        "easy": easy,
-                        "medium": medium,
-                        "hard": hard
-                    }
-            return {"found": False, "total_solved": 0, "easy": 0, "medium": 0, "hard": 0}
-        except Exception as e:
-            return {"found": False, "total_solved": 0, "easy": 0, "medium": 0, "hard": 0}
+            weights = tuple(int(var.get()) for var in self.rank_weight_vars)
+        except (tk.TclError, ValueError):
+            return
+        self.leaderboard.metric = "weighted" if self.rank_metric_var.get() == "Weighted Score" else "total"
+        self.leaderboard.dense = self.rank_type_var.get() == "Dense"
+        self.leaderboard.weights = weights
+        self.leaderboard.rebuild(self.student_data)
+        self.data_version += 1
+        self.renderer.invalidate("table", "details")
+
+    def toggle_watch(self):
+        if self.watch_var.get():
+            self.watcher.start()
+        else:
+            self.watcher.stop()
 
-    def update_display(self):
-        self.status.config(text="Updating display...")
+    def apply_roster_edit(self, section, chunk):
+        """Worker: merge an edited roster file into its section, fetching only added or renamed rows.
+
+        Returns False if the section changed before the merge could be applied (retry later).
+        """
+        start = time.perf_counter()
+        base = self.workspace.rosters.get(section, [])
+        diff = diff_roster(base, chunk)
+        elapsed_ms = 1000 * (time.perf_counter() - start)
+
+        pending, extended = self.ui_events.call(self.patch_roster_edit, section, base, diff)
+        if pending is None:
+            return False
+        _, added, removed, renamed, _ = diff
+        status = (f"{section}: {len(added)} added, {len(removed)} removed, "
+                  f"{len(renamed)} renamed (merged in {elapsed_ms:.0f} ms")
+        if pending:
+            self.ui_events.progress(text=f"{status}, fetching {len(pending)})")
+            limiter = self.concurrency
+            with ThreadPoolExecutor(max_workers=limiter.max_limit) as executor:
+                futures = {
+                    executor.submit(limiter.call, self.fetch_leetcode_data, username, extended): key
+                    for key, username in pending.items()
+                }
+                for future in as_completed(futures):
+                    self.ui_events.post(self.on_refresh_result, futures[future], future.result())
+        self.ui_events.progress(text=f"{status}, {len(pending)} fetched)")
+        return True
+
+    def patch_roster_edit(self, section, base, diff):
+        """Main thread: apply a diff_roster result; returns (usernames to fetch or None if stale, extended)"""
+        extended = self.extended_var.get()
+        if self.workspace.rosters.get(section, []) is not base:
+            return None, extended  # re-uploaded or re-merged meanwhile
+        roster, added, removed, renamed, updates = diff
+        self.workspace.patch_roster(section, roster, added, removed, renamed, updates)
+
+        changed = added + [student for student, _ in renamed]
+        pending = self.workspace.pending_usernames(changed, extended)
+        for student in changed:
+            if normalize_username(student.get("leetcode_username")) in pending:
+                continue  # arrives through on_refresh_result
+            result = self.workspace.store.get(student.get("leetcode_username"))
+            self.apply_fetch_result(student, result or {"found": False, "total_solved": 0,
+                                                        "easy": 0, "medium": 0, "hard": 0})
+        self.student_data = self.workspace.students(self.active_section)
+
+        # Move only the edited rows through the leaderboard and running aggregates
+        for student in removed:
+            self.leaderboard.remove(student["student_id"])
+        for student in added:
+            if self.active_section in (None, section):
+                self.leaderboard.add(student)
+        for student, _ in renamed:
+            self.leaderboard.update(student)
+            self.aggregates.update(student)
+        self.data_version += 1
+        self.set_view(self.student_data.copy())
+        return pending, extended
+
+    def on_refresh_interval_typed(self, event=None):
+        try:
+            minutes = int(self.refresh_interval_var.get())
+        except (tk.TclError, ValueError):
+            return
+        if max(1, minutes) * 60 != self.refresher.interval:
+            self.toggle_auto_refresh()
+
+    def toggle_auto_refresh(self):
+        """Start/stop the background refresh, applying the current interval"""
+        try:
+            self.refresher.set_interval(int(self.refresh_interval_var.get()))
+        except (tk.TclError, ValueError):
+            return
+        self.refresher.stop()
+        if self.auto_refresh_var.get():
+            self.refresher.start()
+
+    def on_refresh_result(self, username, result):
+        """Apply one background-refreshed profile to every record that uses it"""
+        self.workspace.store.put(username, result)
+        charts_changed = False
+        for student in self.workspace.students_with_username(username):
+            self.apply_fetch_result(student, result)
+            self.update_student_row(student)
+            charts_changed |= self.aggregates.update(student)
+            # Move just this student in the leaderboard; patch rows whose rank shifted
+            for student_id in self.leaderboard.update(student):
+                self.update_student_row(self.workspace.student_by_id(student_id))
+        self.data_version += 1
+        if "table" not in self.renderer.dirty:
+            # Rows were patched in place; a pending flush (new view) must still render the table
+            self.renderer.rendered["table"] = (self.view_version, self.data_version)
         
+        self.last_update_time = datetime.now()
+        time_str = self.last_update_time.strftime("%b %d, %Y %I:%M %p")
+        self.update_label.config(text=f"Last updated: {time_str}")
+        if charts_changed and self.live_chart_job is None:
+            # Charts read the running aggregates; redraw them at most once a second
+            self.live_chart_job = self.root.after(1000, self.redraw_live_charts)
+
+    def redraw_live_charts(self):
+        self.live_chart_job = None
+        self.renderer.invalidate("charts")
+
+    def on_refresh_cycle_done(self):
+        """Redraw charts once all due students of a refresh cycle are fetched"""
+        if self.student_data:
+            self.sections_version += 1
+            self.renderer.invalidate("charts", "sections")
+
+    def update_student_row(self, student):
+        """Refresh the table row for this student, if it has one"""
+        iid = student["student_id"]
+        values = self.row_values(student)
+        if iid in self.row_cache and self.row_cache[iid] != values:
+            self.tree.item(iid, values=values)
+            self.row_cache[iid] = values
+
+    def row_values(self, student):
+        return (
+            self.leaderboard.rank(student["student_id"]) or "-",
+            student.get("name", ""),
+            student.get("leetcode_username", ""),
+            student.get("problems_solved", 0),
+            student.get("easy_count", 0),
+            student.get("medium_count", 0),
+            student.get("hard_count", 0),
+            "✅" if student.get("profile_found") else "❌"
+        )
+
+    def fetch_leetcode_data(self, username, extended=False, force=False, max_age=None):
+        if force:
+            # Skip every cache, but let other dashboards see the fresh answer
+            result = self.request_profile(username, extended)
+            if self.shared_cache is not None and not result.get("error"):
+                try:
+                    self.shared_cache.store(normalize_username(username), extended, result)
+                except sqlite3.Error:
+                    pass
+            return result
+        # Consult the cross-process cache first so concurrent dashboards share fetches
+        if self.shared_cache is not None:
+            return self.shared_cache.fetch(
+                username, extended, lambda: self.request_profile(username, extended), max_age)
+        return self.request_profile(username, extended)
+
+    def request_profile(self, username, extended=False):
+        return fetch_profile(self.http, username, extended, self.api_url)
+
+    def apply_fetch_result(self, student, result):
+        """Copy a fetch result into a student record"""
+        if result["found"]:
+            student.update({
+                "problems_solved": result["total_solved"],
+                "easy_count": result["easy"],
+                "medium_count": result["medium"],
+                "hard_count": result["hard"],
+                "profile_found": True
+            })
+        else:
+            student.update({
+                "problems_solved": 0,
+                "easy_count": 0,
+                "medium_count": 0,
+                "hard_count": 0,
+                "profile_found": False
+            })
+        if "extended" in result:
+            student.update(result["extended"])
+
+    def set_view(self, data, status=None):
+        """Show data in the table/charts; the render itself is coalesced"""
+        # Re-applying the same filter yields the same rows - keep the version
+        if len(data) != len(self.displayed_data) or any(
+                a is not b for a, b in zip(data, self.displayed_data)):
+            self.view_version += 1
+        self.displayed_data = data
+        self.aggregates.set_members(data)
+        self.view_status = status
+        self.renderer.invalidate()
+        if status:
+            self.status.config(text=status)
+
+    def update_display(self, status=None):
+        """Student records changed (new upload) - show everything and redraw"""
+        self.data_version += 1
+        self.sections_version += 1
+        self.leaderboard.rebuild(self.student_data)
+        self.aggregates.reset()  # every record may have changed
+        self.set_view(self.student_data.copy(), status=status)
+
+    def on_render_done(self):
         # Update last refresh time
         if self.last_update_time:
             time_str = self.last_update_time.strftime("%b %d, %Y %I:%M %p")
             self.update_label.config(text=f"Last updated: {time_str}")
+        self.status.config(text=self.view_status or f"Ready - {len(self.displayed_data)} students displayed")
+
+    def render_table(self):
+        """Diff the Treeview against displayed_data instead of rebuilding it"""
+        selected = self.tree.selection()
+        wanted = [student["student_id"] for student in self.displayed_data]
+        wanted_set = set(wanted)
         
-        # Clear table
-        self.tree.delete(*self.tree.get_children())
+        # Rows leaving the view: drop rows of unloaded students, detach the rest
+        current = self.tree.get_children()
+        leaving = [iid for iid in current if iid not in wanted_set]
+        gone = [iid for iid in self.row_cache if self.workspace.student_by_id(iid) is None]
+        if leaving:
+            self.tree.detach(*leaving)
+        if gone:
+            self.tree.delete(*gone)
+            for iid in gone:
+                del self.row_cache[iid]
         
-        # Insert data
+        # Rows entering the view or with changed values
         for student in self.displayed_data:
-            self.tree.insert("", tk.END, values=(
-                student.get("name", ""),
-                student.get("leetcode_username", ""),
-                student.get("problems_solved", 0),
-                student.get("easy_count", 0),
-                student.get("medium_count", 0),
-                student.get("hard_count", 0),
-                "✅" if student.get("profile_found") else "❌"
-            ))
-        
-        # Clear student details
-        self.clear_student_details()
+            iid = student["student_id"]
+            values = self.row_values(student)
+            if iid not in self.row_cache:
+                self.tree.insert("", tk.END, iid=iid, values=values)
+            elif self.row_cache[iid] != values:
+                self.tree.item(iid, values=values)
+            self.row_cache[iid] = values
         
-        # Update charts
-        self.update_charts()
-        self.status.config(text=f"Ready - {len(self.displayed_data)} students displayed")
+        # Reorder (and reattach) only if the attached order differs
+        staying = [iid for iid in current if iid in wanted_set]
+        if list(self.tree.get_children()) != wanted:
+            for index, iid in enumerate(wanted):
+                if index >= len(staying) or staying[index] != iid:
+                    break
+            else:
+                index = len(wanted)
+            for position in range(index, len(wanted)):
+                self.tree.move(wanted[position], "", position)
+        
+        # Keep whatever is still visible selected
+        still_selected = [iid for iid in selected if iid in wanted_set]
+        if list(self.tree.selection()) != still_selected:
+            self.tree.selection_set(still_selected)
 
     def update_charts(self):
         # Update Total Problems Chart
@@ -837,287 +3846,211 @@ class LeetCodeDashboard:
         if not self.selected_students:
             self.update_comparison_chart([])
 
-    def update_total_chart(self):
-        # Clear previous chart
-        for widget in self.total_tab.winfo_children():
+    def new_figure(self, tab):
+        """Clear a chart tab; returns (frame, Figure) - matplotlib is imported on first use"""
+        for widget in tab.winfo_children():
             widget.destroy()
+        self.fast_charts.pop(tab, None)
         
         # Create figure frame
-        chart_frame = ttk.Frame(self.total_tab)
+        chart_frame = ttk.Frame(tab)
         chart_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-            
-        fig = Figure(figsize=(8, 5), dpi=100, facecolor=self.colors['bg'])
-        ax = fig.add_subplot(111)
-        
-        # Get top 15 students by problems solved
-        sorted_data = sorted(self.displayed_data, key=lambda x: x.get("problems_solved", 0), reverse=True)[:15]
-        
-        if not sorted_data:
-            # No data - show placeholder
-            ax.text(0.5, 0.5, "No data available", ha='center', va='center', fontsize=14)
-            ax.axis('off')
-        else:
-            names = [s.get("name", "Unknown") for s in sorted_data]
-            values = [s.get("problems_solved", 0) for s in sorted_data]
-            
-            # Create horizontal bar chart
-            bars = ax.barh(names, values, color=self.colors['accent'], alpha=0.8)
-            
-            # Add values to end of bars
-# Add values to end of bars
-            for bar in bars:
-                width = bar.get_width()
-                ax.text(width + 1, bar.get_y() + bar.get_height()/2, 
-                       f'{int(width)}', va='center', fontsize=9)
-            
-            # Style the chart
-            ax.set_title('Top Students by Problems Solved', fontsize=14, pad=15)
-            ax.set_xlabel('Number of Problems', fontsize=12)
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            
-            # Adjust layout
-            plt.tight_layout()
-        
-        # Add the plot to the tab
+        init_matplotlib()
+        from matplotlib.figure import Figure
+        return chart_frame, Figure(figsize=(8, 5), dpi=100, facecolor=self.colors['bg'])
+
+    def show_figure(self, fig, chart_frame):
+        """Add a finished figure to its tab"""
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
         canvas = FigureCanvasTkAgg(fig, chart_frame)
         canvas.draw()
         canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        return canvas
+
+    def fast_charts_for(self, tab, count=1):
+        """Canvas charts living in a tab (fast backend), created once and redrawn in place"""
+        charts = self.fast_charts.get(tab)
+        if charts is None or len(charts) != count:
+            for widget in tab.winfo_children():
+                widget.destroy()
+            chart_frame = ttk.Frame(tab)
+            chart_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            charts = self.fast_charts[tab] = [CanvasBarChart(chart_frame, self.colors) for _ in range(count)]
+        return charts
+
+    def update_total_chart(self):
+        # Top 15 students by problems solved
+        names, values = self.aggregates.total_chart_data()
+        if self.chart_backend == "fast":
+            self.fast_charts_for(self.total_tab)[0].draw(
+                "Top Students by Problems Solved", names, [("Solved", values, self.colors['accent'])],
+                horizontal=True, value_labels=True)
+            return
         
-        self.total_chart = canvas
+        chart_frame, fig = self.new_figure(self.total_tab)
+        draw_total_chart(fig.add_subplot(111), names, values, self.colors)
+        fig.tight_layout()
+        self.total_chart = self.show_figure(fig, chart_frame)
 
     def update_difficulty_chart(self):
-        # Clear previous chart
-        for widget in self.difficulty_tab.winfo_children():
-            widget.destroy()
-        
-        # Create figure frame
-        chart_frame = ttk.Frame(self.difficulty_tab)
-        chart_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        fig = Figure(figsize=(8, 5), dpi=100, facecolor=self.colors['bg'])
-        ax = fig.add_subplot(111)
-        
-        # Get top 10 students by total solved
-        sorted_data = sorted(self.displayed_data, key=lambda x: x.get("problems_solved", 0), reverse=True)[:10]
-        
-        if not sorted_data:
-            # No data - show placeholder
-            ax.text(0.5, 0.5, "No data available", ha='center', va='center', fontsize=14)
-            ax.axis('off')
-        else:
-            names = [s.get("name", "Unknown") for s in sorted_data]
-            easy = [s.get("easy_count", 0) for s in sorted_data]
-            medium = [s.get("medium_count", 0) for s in sorted_data]
-            hard = [s.get("hard_count", 0) for s in sorted_data]
-            
-            # Create stacked bar chart
-            width = 0.7
-            ax.bar(names, easy, width, label='Easy', color=self.colors['easy'])
-            ax.bar(names, medium, width, bottom=easy, label='Medium', color=self.colors['medium'])
-            
-            # Calculate the bottom position for hard problems
-            bottom_hard = [e + m for e, m in zip(easy, medium)]
-            ax.bar(names, hard, width, bottom=bottom_hard, label='Hard', color=self.colors['hard'])
-            
-            # Style the chart
-            ax.set_title('Problem Difficulty Breakdown', fontsize=14, pad=15)
-            ax.set_ylabel('Number of Problems', fontsize=12)
-            ax.legend()
-            
-            # Rotate x-labels for better readability
-            plt.xticks(rotation=45, ha='right')
-            
-            # Remove top and right spines
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            
-            # Adjust layout
-            plt.tight_layout()
-        
-        # Add the plot to the tab
-        canvas = FigureCanvasTkAgg(fig, chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        # Top 10 students by total solved
+        names, easy, medium, hard = self.aggregates.difficulty_chart_data()
+        if self.chart_backend == "fast":
+            self.fast_charts_for(self.difficulty_tab)[0].draw(
+                "Problem Difficulty Breakdown", names,
+                [("Easy", easy, self.colors['easy']), ("Medium", medium, self.colors['medium']),
+                 ("Hard", hard, self.colors['hard'])],
+                stacked=True)
+            return
         
-        self.difficulty_chart = canvas
+        chart_frame, fig = self.new_figure(self.difficulty_tab)
+        draw_difficulty_chart(fig.add_subplot(111), names, easy, medium, hard, self.colors)
+        fig.tight_layout()
+        self.difficulty_chart = self.show_figure(fig, chart_frame)
 
     def update_comparison_chart(self, students):
-        # Clear previous chart
-        for widget in self.comparison_tab.winfo_children():
-            widget.destroy()
-        
         if not students:
             # No students selected - show message
+            for widget in self.comparison_tab.winfo_children():
+                widget.destroy()
             ttk.Label(self.comparison_tab, 
                     text="Select students from the table for comparison", 
                     style='Header.TLabel').pack(expand=True)
             return
         
-        # Create figure frame
-        chart_frame = ttk.Frame(self.comparison_tab)
-        chart_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        fig = Figure(figsize=(8, 5), dpi=100, facecolor=self.colors['bg'])
-        ax = fig.add_subplot(111)
-        
-        # Set width of bars
-        width = 0.25
-        multiplier = 0
-        
-        # X-axis positions
-        x = np.arange(3)  # easy, medium, hard categories
-        
-        # For each student
-        for student in students:
-            counts = [
-                student.get("easy_count", 0),
-                student.get("medium_count", 0),
-                student.get("hard_count", 0)
-            ]
-            
-            offset = width * multiplier
-            rects = ax.bar(x + offset, counts, width, label=student.get("name", "Unknown"))
-            
-            # Add counts above bars
-            for rect in rects:
-                height = rect.get_height()
-                ax.annotate(f'{int(height)}',
-                          xy=(rect.get_x() + rect.get_width() / 2, height),
-                          xytext=(0, 3),  # 3 points vertical offset
-                          textcoords="offset points",
-                          ha='center', va='bottom', fontsize=9)
-            
-            multiplier += 1
-        
-        # Add labels
-        ax.set_title('Student Comparison by Problem Difficulty', fontsize=14, pad=15)
-        ax.set_xticks(x + width, ['Easy', 'Medium', 'Hard'])
-        ax.set_ylabel('Number of Problems', fontsize=12)
-        ax.legend(loc='best')
-        
-        # Remove top and right spines
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        
-        # Adjust layout
-        plt.tight_layout()
-        
-        # Add the plot to the tab
-        canvas = FigureCanvasTkAgg(fig, chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        
-        self.comparison_chart = canvas
+        # Box/violin/heatmap views need matplotlib, whichever backend draws the other charts
+        chart_frame, fig = self.new_figure(self.comparison_tab)
+        draw_comparison_chart(fig.add_subplot(111), *comparison_chart_data(students), self.colors,
+                              mode=self.comparison_mode_var.get())
+        fig.tight_layout()
+        self.comparison_chart = self.show_figure(fig, chart_frame)
 
     def update_progress_chart(self):
-        # Clear previous chart
-        for widget in self.progress_tab.winfo_children():
-            widget.destroy()
-        
-        # Create figure frame
-        chart_frame = ttk.Frame(self.progress_tab)
-        chart_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        # Group students by problems solved ranges
+        counts, = self.aggregates.progress_chart_data()
+        if self.chart_backend == "fast":
+            self.fast_charts_for(self.progress_tab)[0].draw(
+                "Class Distribution by Problems Solved", PROGRESS_LABELS if any(counts) else [],
+                [("Students", counts, self.colors['accent'])], value_labels=True)
+            return
         
-        fig = Figure(figsize=(8, 5), dpi=100, facecolor=self.colors['bg'])
-        ax = fig.add_subplot(111)
+        chart_frame, fig = self.new_figure(self.progress_tab)
+        draw_progress_chart(fig.add_subplot(111), counts, self.colors)
+        fig.tight_layout()
+        self.progress_chart = self.show_figure(fig, chart_frame)
+
+    def update_section_chart(self):
+        summary, distribution = self.workspace.section_aggregates()
+        if self.chart_backend == "fast":
+            means_chart, shares_chart = self.fast_charts_for(self.section_tab, count=2)
+            if summary is None:
+                means_chart.draw("Problems Solved by Section", [], [])
+                shares_chart.draw("Share of Students by Problems Solved", [], [])
+                return
+            sections = list(summary.index)
+            means_chart.draw("Problems Solved by Section", sections,
+                             [("Mean", summary["mean"].values, self.colors['accent']),
+                              ("Median", summary["median"].values, self.colors['highlight'])])
+            shares = distribution.div(distribution.sum(axis=1), axis=0).fillna(0).values
+            shares_chart.draw("Share of Students by Problems Solved", sections,
+                              [(label, shares[:, j], FAST_SECTION_COLORS[j])
+                               for j, label in enumerate(PROGRESS_LABELS)],
+                              stacked=True, tick_format="{:.0%}")
+            return
         
-        if not self.displayed_data:
+        chart_frame, fig = self.new_figure(self.section_tab)
+        if summary is None:
             # No data - show placeholder
+            ax = fig.add_subplot(111)
             ax.text(0.5, 0.5, "No data available", ha='center', va='center', fontsize=14)
             ax.axis('off')
         else:
-            # Group students by problems solved ranges
-            ranges = [(0, 0), (1, 25), (26, 50), (51, 100), (101, 200), (201, 300), (301, float('inf'))]
-            labels = ['0', '1-25', '26-50', '51-100', '101-200', '201-300', '301+']
-            
-            # Count students in each range
-            counts = [0] * len(ranges)
-            for student in self.displayed_data:
-                problems = student.get("problems_solved", 0)
-                for i, (min_val, max_val) in enumerate(ranges):
-                    if min_val <= problems <= max_val:
-                        counts[i] += 1
-                        break
+            sections = list(summary.index)
+            x = np.arange(len(sections))
             
-            # Create bar chart
-            bars = ax.bar(labels, counts, color=self.colors['accent'], alpha=0.8)
+            # Mean and median solved per section
+            ax = fig.add_subplot(211)
+            width = 0.4
+            ax.bar(x - width / 2, summary["mean"].values, width, label='Mean', color=self.colors['accent'])
+            ax.bar(x + width / 2, summary["median"].values, width, label='Median', color=self.colors['highlight'])
+            ax.set_xticks(x, sections)
+            ax.set_title('Problems Solved by Section', fontsize=12)
+            ax.legend(loc='best', fontsize=8)
             
-            # Add counts above bars
-            for bar in bars:
-                height = bar.get_height()
-                if height > 0:
-                    ax.text(bar.get_x() + bar.get_width()/2, height + 0.1,
-                          f'{int(height)}', ha='center', va='bottom', fontsize=10)
+            # Stacked bucket distribution per section (share of students)
+            ax2 = fig.add_subplot(212)
+            shares = distribution.div(distribution.sum(axis=1), axis=0).fillna(0).values
+            bottoms = np.zeros(len(sections))
+            matplotlib = init_matplotlib()
+            cmap = matplotlib.colormaps['viridis'] if hasattr(matplotlib, 'colormaps') else matplotlib.cm.get_cmap('viridis')
+            for j, label in enumerate(PROGRESS_LABELS):
+                ax2.bar(x, shares[:, j], 0.6, bottom=bottoms, label=label,
+                        color=cmap(j / (len(PROGRESS_LABELS) - 1)))
+                bottoms += shares[:, j]
+            ax2.set_xticks(x, sections)
+            ax2.set_ylabel('Share of Students', fontsize=10)
+            ax2.legend(loc='center left', bbox_to_anchor=(1.0, 0.5), fontsize=7)
             
-            # Style the chart
-            ax.set_title('Class Distribution by Problems Solved', fontsize=14, pad=15)
-            ax.set_xlabel('Number of Problems', fontsize=12)
-            ax.set_ylabel('Number of Students', fontsize=12)
-            
-            # Remove top and right spines
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
+            for axis in (ax, ax2):
+                axis.spines['top'].set_visible(False)
+                axis.spines['right'].set_visible(False)
+                axis.tick_params(axis='x', labelrotation=30, labelsize=8)
             
             # Adjust layout
-            plt.tight_layout()
-        
-        # Add the plot to the tab
-        canvas = FigureCanvasTkAgg(fig, chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            fig.tight_layout()
         
-        self.progress_chart = canvas
+        self.section_chart = self.show_figure(fig, chart_frame)
 
     def search_data(self):
-        query = self.search_var.get().lower().strip()
-        if query:
-            self.displayed_data = [
-                student for student in self.student_data
-                if query in str(student.get("name", "")).lower() or
-                   query in str(student.get("leetcode_username", "")).lower() or
-                   query in str(student.get("roll_number", "")).lower() or
-                   query in str(student.get("email", "")).lower()
-            ]
-        else:
-            self.displayed_data = self.student_data.copy()
+        """Filter by the search box: plain text, or an expression like  hard>=10 and profile:valid"""
+        query = self.search_var.get().strip()
+        if not query:
+            self.set_view(self.student_data.copy())
+            return
         
-        self.update_display()
+        try:
+            results = self.filter_engine.search(self.student_data, self.data_version, query)
+        except FilterError as e:
+            messagebox.showerror("Invalid Filter", str(e))
+            return
+        
+        self.set_view(results, status=f"{len(results)} students match: {query}")
+
+    def apply_filter(self, expression, empty_title, empty_message, status):
+        """Run a filter expression from the menu; it lands in the search box so it can be extended"""
+        if not self.student_data:
+            messagebox.showinfo("No Data", "Please upload student data first.")
+            return
+
+        results = self.filter_engine.filter(self.student_data, self.data_version, expression)
+        if not results:
+            messagebox.showinfo(empty_title, empty_message)
+            return
+
+        self.search_var.set(expression)
+        self.set_view(results, status=status.format(count=len(results)))
 
     def clear_search(self):
         self.search_var.set("")
-        self.displayed_data = self.student_data.copy()
-        self.update_display()
+        self.set_view(self.student_data.copy())
 
-    def on_student_select(self, event):
-        # Get selected items
+    def on_student_select(self, event=None):
+        # Get selected items (iids are student IDs)
         selected_items = self.tree.selection()
+        self.selected_students = [
+            student for student in map(self.workspace.student_by_id, selected_items) if student
+        ]
         
-        if selected_items:
-            # Get the first selected student to display details
-            selected_id = selected_items[0]
-            selected_idx = self.tree.index(selected_id)
-            
-            if 0 <= selected_idx < len(self.displayed_data):
-                self.update_student_details(self.displayed_data[selected_idx])
-            
-            # Update selected students list for comparison
-            self.selected_students = []
-            for item in selected_items:
-                idx = self.tree.index(item)
-                if 0 <= idx < len(self.displayed_data):
-                    self.selected_students.append(self.displayed_data[idx])
+        if self.selected_students:
+            # Show the first selected student's details
+            self.update_student_details(self.selected_students[0])
         else:
             self.clear_student_details()
-            self.selected_students = []
 
     def compare_selected(self):
         if len(self.selected_students) < 1:
             messagebox.showinfo("Selection Required", "Please select at least one student to compare.")
             return
-        elif len(self.selected_students) > 5:
-            messagebox.showinfo("Too Many Selected", "Please select no more than 5 students for comparison.")
-            return
         
         self.update_comparison_chart(self.selected_students)
         # Switch to comparison tab
@@ -1147,65 +4080,285 @@ class LeetCodeDashboard:
 
     def show_valid_profiles(self):
         """Display only students with valid LeetCode profiles"""
-        if not self.student_data:
-            messagebox.showinfo("No Data", "Please upload student data first.")
-            return
-
-        valid_profiles = [
-            student for student in self.student_data
-            if student.get("profile_found", False)
-        ]
-
-        if not valid_profiles:
-            messagebox.showinfo("No Valid Profiles", "No students with valid LeetCode profiles found.")
-            return
-
-        self.displayed_data = valid_profiles
-        self.update_display()
-        self.status.config(text=f"Showing {len(valid_profiles)} students with valid LeetCode profiles")
+        self.apply_filter("profile:valid", "No Valid Profiles",
+                          "No students with valid LeetCode profiles found.",
+                          "Showing {count} students with valid LeetCode profiles")
 
     def show_top_students(self):
-        """Display top 10 students by problems solved"""
+        """Display top 10 students by the current ranking"""
         if not self.student_data:
             messagebox.showinfo("No Data", "Please upload student data first.")
             return
 
-        top_students = sorted(
-            self.student_data, 
-            key=lambda x: x.get("problems_solved", 0), 
-            reverse=True
-        )[:10]
+        top_students = [self.workspace.student_by_id(student_id) for student_id in self.leaderboard.top(10)]
 
-        self.displayed_data = top_students
-        self.update_display()
-        self.status.config(text=f"Showing top 10 students by problems solved")
+        self.set_view(top_students, status="Showing top 10 students by rank")
 
     def show_zero_solved(self):
         """Display students who haven't solved any problems"""
-        if not self.student_data:
-            messagebox.showinfo("No Data", "Please upload student data first.")
-            return
+        self.apply_filter("total=0 and profile:any", "No Data",
+                          "No students with zero solved problems found.",
+                          "Showing {count} students with zero solved problems")
 
-        zero_solved = [
-            student for student in self.student_data
-            if student.get("problems_solved", 0) == 0 and student.get("leetcode_username")
-        ]
 
-        if not zero_solved:
-            messagebox.showinfo("No Data", "No students with zero solved problems found.")
-            return
+class Tracer:
+    """Opt-in span recorder (--trace) writing Chrome trace-event JSON for Perfetto.
 
-        self.displayed_data = zero_solved
-        self.update_display()
-        self.status.config(text=f"Showing {len(zero_solved)} students with zero solved problems")
+    install() patches Tk's callback dispatcher, thread-pool submission,
+    Thread.run and the dashboard's methods; nothing is patched unless
+    tracing is requested, so the normal run pays nothing.
+    """
+
+    # Called once per row - hundreds of thousands of spans; the stack sampler covers them
+    PER_ROW_METHODS = frozenset({"row_values", "update_student_row", "apply_fetch_result"})
+
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self.origin = time.perf_counter()
+        self.events = []  # list.append is atomic - no lock on the hot path
+        self.named = set()
+
+    def _now(self):
+        return (time.perf_counter() - self.origin) * 1e6
+
+    @staticmethod
+    def describe(func):
+        """Readable span name for a callback; looks through Tk's after() wrapper and lambdas"""
+        code = getattr(func, "__code__", None)
+        if code is not None and code.co_name == "callit" and "func" in code.co_freevars:
+            func = func.__closure__[code.co_freevars.index("func")].cell_contents
+            code = getattr(func, "__code__", None)
+        name = getattr(func, "__qualname__", None) or type(func).__name__
+        if code is not None and code.co_name == "<lambda>":
+            name = f"{name}:{code.co_firstlineno}"
+        return name
+
+    def span(self, name, category, func, *args, **kwargs):
+        thread = current_thread()
+        if thread.ident not in self.named:
+            self.named.add(thread.ident)
+            self.events.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": thread.ident,
+                                "args": {"name": thread.name}})
+        start = self._now()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.events.append({"name": name, "cat": category, "ph": "X", "ts": start,
+                                "dur": self._now() - start, "pid": self.pid, "tid": thread.ident})
+
+    def wrap(self, func, category, name=None):
+        name = name or self.describe(func)
+
+        @functools.wraps(func)
+        def traced(*args, **kwargs):
+            return self.span(name, category, func, *args, **kwargs)
+        return traced
+
+    def install(self, classes=()):
+        tracer = self
+        tk_call = tk.CallWrapper.__call__
+        submit = ThreadPoolExecutor.submit
+        thread_run = Thread.run
+
+        def traced_tk_call(wrapper, *args):
+            return tracer.span(tracer.describe(wrapper.func), "tk", tk_call, wrapper, *args)
+
+        def traced_submit(executor, fn, *args, **kwargs):
+            return submit(executor, tracer.wrap(fn, "worker"), *args, **kwargs)
+
+        def traced_run(thread):
+            target = getattr(thread, "_target", None)
+            if getattr(target, "__module__", "").startswith("concurrent."):
+                return thread_run(thread)  # pool worker loop - its tasks get their own spans
+            name = tracer.describe(target) if target else type(thread).__name__
+            return tracer.span(name, "thread", thread_run, thread)
+
+        tk.CallWrapper.__call__ = traced_tk_call
+        ThreadPoolExecutor.submit = traced_submit
+        Thread.run = traced_run
+        # Nested spans for the public methods of the app (update_display, sort_treeview, chart builders, ...)
+        for cls in classes:
+            for attr, value in list(vars(cls).items()):
+                if (isinstance(value, FunctionType) and not attr.startswith("_")
+                        and attr not in self.PER_ROW_METHODS):
+                    setattr(cls, attr, self.wrap(value, cls.__name__, f"{cls.__name__}.{attr}"))
+        atexit.register(self.save)
+        return self
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": list(self.events), "displayTimeUnit": "ms"}, f)
+
+
+class StackSampler:
+    """Samples every thread's Python stack on a timer; save() writes collapsed stacks (flamegraph.pl, speedscope)"""
+
+    def __init__(self, path, interval=0.005):
+        self.path = path
+        self.interval = interval
+        self.stacks = Counter()
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.thread = Thread(target=self._run, name="stack-sampler", daemon=True)
+        self.thread.start()
+        atexit.register(self.save)
+        return self
+
+    def _run(self):
+        own = current_thread().ident
+        while self.running:
+            names = {thread.ident: thread.name for thread in threading_enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    def save(self):
+        self.running = False
+        with open(self.path, "w", encoding="utf-8") as f:
+            for stack, samples in self.stacks.most_common():
+                f.write(f"{stack} {samples}\n")
+
+
+def roster_cache_dir(args):
+    return None if args.no_roster_cache else args.roster_cache
+
+
+def run_coordinator(args, shared_cache=None):
+    """Headless coordinator: shard the rosters' usernames, wait for workers, save the merged results"""
+    usernames = []
+    for chunk in parse_roster_files(args.coordinate, roster_cache_dir(args)):
+        if "error" in chunk:
+            sys.exit(f"{chunk['path']}: {chunk['error']}")
+        usernames.extend(chunk["columns"]["leetcode_username"].tolist())
+
+    host, _, port = args.listen.rpartition(":")
+    coordinator = FetchCoordinator(usernames, args.extended, args.shard_size, args.lease,
+                                   host or "127.0.0.1", int(port), args.token).start()
+    print(f"Coordinating {len(coordinator.shards)} shards at {coordinator.url} - start workers with: "
+          f"python main.py --worker {coordinator.url} --token {coordinator.token}")
+    try:
+        while not coordinator.done():
+            coordinator.wait(timeout=5)
+            print("Progress:", coordinator.status())
+        results = coordinator.wait()
+    finally:
+        # Let polling workers see "done" before the server goes away
+        time.sleep(min(2.0, args.lease))
+        coordinator.close()
+
+    if shared_cache is not None:
+        # Dashboards on this machine pick the results up without refetching
+        for username, result in results.items():
+            if not result.get("error"):
+                shared_cache.store(username, args.extended, result)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f)
+    print(f"Done: {len(results)} profiles, {coordinator.status()}")
 
 
 def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="LeetCode Student Performance Dashboard")
+    parser.add_argument("--bench-memory", type=int, metavar="ROWS",
+                        help="report student record memory usage for ROWS rows and exit")
+    parser.add_argument("--shared-cache", metavar="PATH",
+                        default=default_cache_path(),
+                        help="SQLite fetch cache shared with other dashboard instances (default: per-user "
+                             "cache dir). To share between accounts, use a path in a directory owned by a "
+                             "group of trusted TAs with setgid set and umask 002 - anyone who can write the "
+                             "file can change the stats every dashboard shows")
+    parser.add_argument("--no-shared-cache", action="store_true",
+                        help="fetch independently of other running dashboards")
+    parser.add_argument("--roster-cache", metavar="DIR", default=default_roster_cache_dir(),
+                        help="directory caching parsed workbooks by content hash (default: per-user cache dir)")
+    parser.add_argument("--no-roster-cache", action="store_true",
+                        help="parse every workbook from scratch and keep no parsed copy on disk")
+    parser.add_argument("--record", metavar="PATH",
+                        help="save every LeetCode API response to PATH for later replay")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="serve LeetCode API responses from a recording instead of the network")
+    parser.add_argument("--replay-latency", type=float, default=0.0, metavar="MS",
+                        help="delay added to each replayed response")
+    parser.add_argument("--replay-synthesize", action="store_true",
+                        help="answer unrecorded requests with a deterministic recorded response")
+    parser.add_argument("--api-url", default=LEETCODE_API_URL,
+                        help="GraphQL endpoint to fetch profiles from (e.g. a mock API)")
+    parser.add_argument("--coordinate", nargs="+", metavar="ROSTER",
+                        help="serve the usernames of these rosters to --worker processes and exit when done")
+    parser.add_argument("--listen", default="127.0.0.1:8765", metavar="HOST:PORT",
+                        help="address the coordinator listens on")
+    parser.add_argument("--shard-size", type=int, default=50,
+                        help="usernames per shard handed to a worker")
+    parser.add_argument("--lease", type=float, default=60.0, metavar="SECONDS",
+                        help="reassign a shard whose worker has not reported for this long")
+    parser.add_argument("--extended", action="store_true",
+                        help="coordinator: fetch extended stats")
+    parser.add_argument("--out", metavar="PATH",
+                        help="coordinator: write the merged {username: result} JSON here")
+    parser.add_argument("--worker", metavar="URL",
+                        help="run headless, fetching shards from the coordinator at URL")
+    parser.add_argument("--token", default=os.environ.get("LEETCODE_DASHBOARD_TOKEN"),
+                        help="shared secret between coordinator and workers (coordinator: random if unset; "
+                             "also read from LEETCODE_DASHBOARD_TOKEN)")
+    parser.add_argument("--charts", choices=("matplotlib", "fast"), default="matplotlib",
+                        help="chart backend: matplotlib, or fast tk.Canvas drawing (matplotlib only for "
+                             "comparisons and reports)")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="record Tk callbacks, worker tasks and dashboard methods as a Chrome trace (Perfetto)")
+    parser.add_argument("--profile-stacks", metavar="PATH",
+                        help="sample all thread stacks and write collapsed stacks for flamegraphs")
+    parser.add_argument("--sample-ms", type=float, default=5.0,
+                        help="stack sampling interval")
+    args = parser.parse_args()
+
+    if args.trace:
+        # Handlers and schedulers only; per-row work (aggregates, leaderboard) is for --profile-stacks
+        Tracer(args.trace).install([LeetCodeDashboard, RenderScheduler, UIEventQueue])
+    if args.profile_stacks:
+        StackSampler(args.profile_stacks, args.sample_ms / 1000.0).start()
+
+    if args.bench_memory:
+        benchmark_record_memory(args.bench_memory)
+        return
+
+    transport = None
+    if args.replay:
+        transport = ReplayTransport(args.replay, args.replay_latency / 1000.0, args.replay_synthesize)
+    elif args.record:
+        transport = RecordingTransport(args.record)
+    # Replayed runs stay self-contained: no cache shared with live instances
+    use_shared_cache = not (args.no_shared_cache or args.replay)
+
+    if args.worker:
+        if not args.token:
+            parser.error("--worker needs the coordinator's --token")
+        fetched = run_fetch_worker(args.worker.rstrip("/"), args.token, args.api_url, transport)
+        print(f"Worker finished: {fetched} profiles fetched")
+        return
+
+    if args.coordinate:
+        run_coordinator(args, open_shared_cache(args.shared_cache) if use_shared_cache else None)
+        return
+
     root = tk.Tk()
     root.geometry("1280x720")
     root.minsize(1000, 650)
     root.configure(bg='#f5f5f7')
-    app = LeetCodeDashboard(root)
+    shared_cache = open_shared_cache(args.shared_cache) if use_shared_cache else None
+    app = LeetCodeDashboard(root, shared_cache=shared_cache, transport=transport, api_url=args.api_url,
+                            chart_backend=args.charts, roster_cache_dir=roster_cache_dir(args))
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+"""Mock LeetCode GraphQL endpoint for local testing.
+
+Answers the profile query with deterministic per-username counts; every
+tenth username does not exist. Run standalone with
+
+    python tests/mock_leetcode_api.py 8900
+
+and point the dashboard or a worker at it with --api-url http://127.0.0.1:8900.
+"""
+
+import hashlib
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+
+def mock_profile(username):
+    """GraphQL "data" payload the mock returns for username"""
+    h = int(hashlib.md5(username.lower().encode("utf-8")).hexdigest(), 16)
+    if h % 10 == 0:
+        return {"matchedUser": None}
+    return {"matchedUser": {"submitStats": {"acSubmissionNum": [
+        {"difficulty": "All", "count": h % 100 + h % 50 + h % 7},
+        {"difficulty": "Easy", "count": h % 100},
+        {"difficulty": "Medium", "count": h % 50},
+        {"difficulty": "Hard", "count": h % 7},
+    ]}}}
+
+
+class MockAPIHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            username = payload["variables"]["username"]
+        except (ValueError, KeyError, TypeError):
+            self.send_error(400)
+            return
+        time.sleep(self.server.latency)
+        body = json.dumps({"data": mock_profile(username)}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_api(port=0, latency=0.01):
+    """Serve the mock on a background thread; returns (server, url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockAPIHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    server, url = start_mock_api(int(sys.argv[1]) if len(sys.argv) > 1 else 8900)
+    print(f"Mock LeetCode API at {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,63 @@
+"""Coordinator + several worker processes against the mock API must match a single-node fetch"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main  # noqa: E402
+from mock_leetcode_api import start_mock_api  # noqa: E402
+
+USERNAMES = [f"student{i}" for i in range(120)] + ["Student7", " student8 ", ""]
+WORKERS = 3
+
+
+class DistributedFetchTest(unittest.TestCase):
+    def setUp(self):
+        self.api, self.api_url = start_mock_api()
+        self.coordinator = main.FetchCoordinator(USERNAMES, shard_size=10, lease=5.0, token="test-token").start()
+
+    def tearDown(self):
+        self.coordinator.close()
+        self.api.shutdown()
+        self.api.server_close()
+
+    def single_node(self):
+        keys = dict.fromkeys(filter(None, map(main.normalize_username, USERNAMES)))
+        with httpx.Client(timeout=10.0) as client:
+            return {key: main.fetch_profile(client, key, False, self.api_url) for key in keys}
+
+    def start_worker(self, token):
+        return subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "main.py"), "--worker", self.coordinator.url,
+             "--token", token, "--api-url", self.api_url, "--no-shared-cache"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+    def test_workers_match_single_node(self):
+        workers = [self.start_worker("test-token") for _ in range(WORKERS)]
+        try:
+            results = self.coordinator.wait(timeout=60)
+        finally:
+            outputs = [worker.communicate(timeout=60) for worker in workers]
+        for worker, (_, stderr) in zip(workers, outputs):
+            self.assertEqual(worker.returncode, 0, stderr)
+        self.assertTrue(self.coordinator.done())
+        self.assertEqual(results, self.single_node())
+        self.assertEqual(sum(self.coordinator.status()["workers"].values()), len(results))
+
+    def test_wrong_token_is_rejected(self):
+        worker = self.start_worker("not-the-token")
+        _, stderr = worker.communicate(timeout=60)
+        self.assertNotEqual(worker.returncode, 0)
+        self.assertIn("401", stderr)
+        self.assertEqual(self.coordinator.status()["results"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()